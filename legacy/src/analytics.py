@@ -1,10 +1,13 @@
 # analytics.py
 
+import hashlib
+import json
+
 import numpy as np
 import pandas as pd
 
 from constants import GLOBAL_STAT_CATEGORIES, GK_STAT_CATEGORIES, get_role_specific_weights, get_gk_roles
-from config_handler import get_role_multiplier
+from config_handler import get_role_multiplier, get_outfield_weights, get_gk_weights
 
 def calculate_dwrs(player, role, weights):
     stat_categories = GK_STAT_CATEGORIES if role in get_gk_roles() else GLOBAL_STAT_CATEGORIES
@@ -55,10 +58,9 @@ def calculate_dwrs(player, role, weights):
 # minutes of pure Python; the batch path below produces identical numbers via
 # numpy in a few seconds. update_dwrs_ratings() uses the batch path.
 
-def _parse_attr_column(series):
-    """Vectorized equivalent of the per-value parsing in calculate_dwrs:
-    numbers pass through, masked ranges like '12-15' become their mean,
-    everything unparsable becomes 0.0."""
+def _parse_attr_values(series):
+    """Numbers pass through and masked ranges like '12-15' become their mean;
+    everything unparsable is left as NaN."""
     values = pd.to_numeric(series, errors='coerce')
     unparsed = values.isna()
     if unparsed.any():
@@ -72,7 +74,14 @@ def _parse_attr_column(series):
                 pd.to_numeric(parts[0], errors='coerce')
                 + pd.to_numeric(parts[1], errors='coerce')
             ) / 2
-    return values.fillna(0.0).to_numpy(dtype=np.float64)
+    return values
+
+
+def _parse_attr_column(series):
+    """Vectorized equivalent of the per-value parsing in calculate_dwrs:
+    numbers pass through, masked ranges like '12-15' become their mean,
+    everything unparsable becomes 0.0."""
+    return _parse_attr_values(series).fillna(0.0).to_numpy(dtype=np.float64)
 
 
 def build_attribute_matrix(df):
@@ -136,4 +145,21 @@ def calculate_dwrs_role_batch(attr_matrix, role, weights, rows):
         normalized = np.round((absolute - worst_possible) / denom * 100, 0)
     else:
         normalized = np.zeros(n, dtype=np.float64)
-    return absolute, normalized
\ No newline at end of file
+    return absolute, normalized
+
+
+def dwrs_weights_signature():
+    """
+    Fingerprint of every setting that shapes a DWRS value apart from the
+    player's own attributes: category weights, role multipliers and the
+    key/preferable attributes per role. Ratings persisted under a different
+    signature are stale and need recalculating.
+    """
+    payload = {
+        "weights": get_outfield_weights(),
+        "gk_weights": get_gk_weights(),
+        "multipliers": [get_role_multiplier('key'), get_role_multiplier('preferable')],
+        "role_weights": get_role_specific_weights(),
+        "gk_roles": sorted(get_gk_roles()),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
@@ -27,13 +27,14 @@ from page_views.national_dashboard import national_dashboard_page
 
 from data_parser import load_data, parse_and_update_data
 from sqlite_db import (get_second_team_club, set_second_team_club, get_user_club, set_user_club, get_all_players, update_dwrs_ratings,
-                        get_favorite_tactics, get_national_mode_enabled, update_player_club)
-from constants import get_valid_roles, get_tactic_roles
+                        get_favorite_tactics, get_national_mode_enabled, update_player_club,
+                        refresh_stale_dwrs_ratings)
+from constants import get_valid_roles, get_tactic_roles, get_sorted_tactic_names
 from config_handler import save_theme_settings, get_theme_settings
 from ui_components import clear_all_caches, display_strength_grid, display_custom_header, display_player_table
 from data_parser import get_player_role_matrix
 from definitions_handler import PROJECT_ROOT
-from squad_logic import get_cached_squad_analysis
+from squad_logic import get_cached_squad_analysis, calculate_positional_strengths
 from utils import  hex_to_rgb, format_role_display, value_to_float
 from theme_handler import set_theme_toml
 from role_logic import auto_assign_roles_to_unassigned
@@ -211,7 +212,7 @@ def sidebar(df, players):
         if st.session_state.management_mode == "Club":
             _render_player_search(players)
             st.divider()
-            club_options = ["Select a club"] + sorted(df['Club'].unique()) if df is not None else ["Select a club"]
+            club_options = ["Select a club"] + list(df['Club'].cat.categories) if df is not None else ["Select a club"]
             current_club = get_user_club() or "Select a club"
             club_index = club_options.index(current_club) if current_club in club_options else 0
             selected_club = st.selectbox("Your Club", options=club_options, index=club_index)
@@ -428,7 +429,7 @@ def main_page(uploaded_file, df, players): # Add 'players' to the function signa
     # --- 2. TACTIC SELECTION FOR DASHBOARD ANALYSIS ---
     st.subheader("Dashboard Analysis")
     fav_tactic1, _ = get_favorite_tactics()
-    all_tactics = sorted(list(get_tactic_roles().keys()))
+    all_tactics = get_sorted_tactic_names()
     try:
         default_index = all_tactics.index(fav_tactic1) if fav_tactic1 in all_tactics else 0
     except ValueError:
@@ -440,7 +441,7 @@ def main_page(uploaded_file, df, players): # Add 'players' to the function signa
     analysis_results = None # Initialize to None
     with st.spinner(f"Analyzing your squad's fit for the '{selected_tactic}' tactic..."):
         second_team_club = get_second_team_club()
-        analysis_results = get_cached_squad_analysis(players, selected_tactic, user_club, second_team_club)
+        analysis_results = get_cached_squad_analysis(selected_tactic, user_club, second_team_club)
 
     if not analysis_results or analysis_results["core_squad_df"].empty:
         st.warning(f"Could not generate a squad for the '{selected_tactic}' tactic. There may be no suitable players in your club.")
@@ -484,27 +485,13 @@ def main_page(uploaded_file, df, players): # Add 'players' to the function signa
 
     with strength_col:
         
-        positional_strengths = {}
-        tactic_positions = get_tactic_roles()[selected_tactic]
-        xi_squad = analysis_results["first_team_squad_data"]["starting_xi"]
-        b_team_squad = analysis_results["first_team_squad_data"]["b_team"]
-        depth_options = analysis_results["first_team_squad_data"]["best_depth_options"]
-
-        for pos_key, role in tactic_positions.items():
-            ratings = []
-            def add_rating(player_obj):
-                if player_obj and player_obj.get('name') != '-':
-                    try: ratings.append(int(player_obj['rating'].rstrip('%')))
-                    except (ValueError, TypeError): pass
-
-            add_rating(xi_squad.get(pos_key))
-            add_rating(b_team_squad.get(pos_key))
-            for player in depth_options.get(role, []): add_rating(player)
-
-            if ratings:
-                positional_strengths[pos_key] = {'avg': sum(ratings) / len(ratings), 'min': min(ratings), 'max': max(ratings)}
-            else:
-                positional_strengths[pos_key] = {'avg': 0, 'min': 0, 'max': 0}
+        first_team = analysis_results["first_team_squad_data"]
+        positional_strengths = calculate_positional_strengths(
+            get_tactic_roles()[selected_tactic],
+            first_team["starting_xi"],
+            first_team["b_team"],
+            first_team["best_depth_options"],
+        )
 
         current_theme_mode = get_theme_settings().get('current_mode', 'night')
         display_strength_grid(positional_strengths, selected_tactic, mode=current_theme_mode)
@@ -527,16 +514,13 @@ def main_page(uploaded_file, df, players): # Add 'players' to the function signa
         return
 
     # --- 2. Prepare the data for filtering and comparison ---
-    my_club_matrix = full_matrix[full_matrix['Club'] == user_club].copy()
+    my_club_matrix = full_matrix[full_matrix['Club'] == user_club]
     
     exclude_clubs = [user_club]
     if second_team_club: exclude_clubs.append(second_team_club)
-    scouted_matrix = full_matrix[~full_matrix['Club'].isin(exclude_clubs)].copy()
-
-    # Convert columns to numeric for filtering
-    scouted_matrix['AgeNum'] = pd.to_numeric(scouted_matrix['Age'], errors='coerce')
-    scouted_matrix['ValueNum'] = scouted_matrix['Transfer Value'].apply(value_to_float)
-    scouted_matrix.dropna(subset=['AgeNum', 'ValueNum'], inplace=True) # Drop players with no age/value
+    # Numeric AgeNum/ValueNum come precomputed with the matrix
+    scouted_matrix = full_matrix[~full_matrix['Club'].isin(exclude_clubs)]
+    scouted_matrix = scouted_matrix.dropna(subset=['AgeNum', 'ValueNum']) # Drop players with no age/value
 
     # --- 3. UI Filters (Sliders) ---
     filter_c1, filter_c2 = st.columns(2)
@@ -620,9 +604,13 @@ def load_app_data():
     Both load_data() and get_all_players() are already @st.cache_data-cached,
     so calling this repeatedly is cheap; the point of routing every page
     through one helper is consistency and a single place to refresh after an
-    upload. Returns a (df, players) tuple.
+    upload. Stored DWRS ratings are recalculated here first if they were
+    produced under different weights. Returns a (df, players) tuple.
     """
     df = load_data()
+    if df is not None and refresh_stale_dwrs_ratings(df):
+        clear_all_caches()
+        df = load_data()
     players = get_all_players()
     return df, players
 
@@ -145,6 +145,18 @@ def set_weight(key, value):
     with open(CONFIG_FILE, 'w') as f:
         config.write(f)
     load_config.clear()
+    get_outfield_weights.clear()
+    get_gk_weights.clear()
+
+@st.cache_data
+def get_outfield_weights():
+    """All outfield category weights as {category: weight}, defaults filled in."""
+    return {cat: get_weight(cat.lower().replace(" ", "_"), default) for cat, default in WEIGHT_DEFAULTS.items()}
+
+@st.cache_data
+def get_gk_weights():
+    """All goalkeeper category weights as {category: weight}, defaults filled in."""
+    return {cat: get_weight("gk_" + cat.lower().replace(" ", "_"), default) for cat, default in GK_WEIGHT_DEFAULTS.items()}
 
 def get_apt_weight(key, default=1.0):
     """Gets the weight for a given Agreed Playing Time status."""
@@ -202,8 +214,11 @@ def set_age_threshold(player_type, value):
     load_config.clear()
 
 
+@st.cache_data
 def get_theme_settings():
-    """Gets the entire theme settings dictionary from the config."""
+    """Gets the entire theme settings dictionary from the config.
+    Cached on its own: every page render reads it, and going through
+    load_config() copies the whole parsed config each time."""
     config = load_config()
     return dict(config['ThemeSettings'])
 
@@ -219,6 +234,7 @@ def save_theme_settings(settings):
     with open(CONFIG_FILE, 'w') as f:
         config.write(f)
     load_config.clear() # Clear cache to reflect changes
+    get_theme_settings.clear()
 
 def get_selection_bonus(key):
     """Gets a bonus multiplier from the [SelectionBonuses] section."""
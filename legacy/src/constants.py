@@ -1,6 +1,9 @@
 # constants.py
 
 import os
+from functools import lru_cache
+
+import streamlit as st
 from definitions_loader import load_definitions
 
 # --- DYNAMIC DEFINITION FUNCTIONS ---
@@ -10,18 +13,37 @@ from definitions_loader import load_definitions
 def get_player_roles():
     return load_definitions().get('player_roles', {})
 
+# Read on every rerun by most pages, often several times; each
+# load_definitions() call returns a fresh unpickled copy of the whole file.
+# The results are shared and must not be mutated; clear_all_caches() resets
+# them after definitions change.
+@lru_cache(maxsize=1)
 def get_role_specific_weights():
     return load_definitions().get('role_specific_weights', {})
 
+@lru_cache(maxsize=1)
 def get_position_to_role_mapping():
-    return load_definitions().get('position_to_role_mapping', {})
+    """Each game position's roles as a tuple, already sorted by display name
+    so dropdowns can list them as they are."""
+    role_names = {role: name for category in get_player_roles().values() for role, name in category.items()}
+    return {pos: tuple(sorted(roles, key=lambda r: role_names.get(r, r)))
+            for pos, roles in load_definitions().get('position_to_role_mapping', {}).items()}
 
+@lru_cache(maxsize=1)
 def get_tactic_roles():
     return load_definitions().get('tactic_roles', {})
 
 def get_tactic_layouts():
     return load_definitions().get('tactic_layouts', {})
 
+@st.cache_resource
+def get_sorted_tactic_names():
+    """Tactic names in alphabetical order, for the tactic pickers. Cached so
+    pages don't copy the full definitions and re-sort on every rerun; the
+    list is shared, so callers must not mutate it."""
+    return sorted(get_tactic_roles().keys())
+
+@lru_cache(maxsize=1)
 def get_valid_roles():
     """Generates and returns a sorted list of all valid role abbreviations."""
     player_roles = get_player_roles()
@@ -170,6 +192,8 @@ PLAYER_ROLE_MATRIX_COLUMNS = [
     # Needed by the Domestic Talent Filter (mentality drives development)
     "Determination",
     "Work Rate",
+    # Shown in the National Dashboard's squad table
+    "Average Rating",
 ]
 
 # Global stat categories for DWRS rating
@@ -211,6 +235,17 @@ GK_STAT_CATEGORIES = {
     "One vs One": "Medium Importance",
 }
 
+# The same stat categories inverted to category -> attributes (in table
+# order), for pages that list or average attributes by importance tier.
+def _attrs_by_category(stat_categories):
+    by_category = {}
+    for attr, category in stat_categories.items():
+        by_category.setdefault(category, []).append(attr)
+    return {category: tuple(attrs) for category, attrs in by_category.items()}
+
+GLOBAL_STAT_BY_CATEGORY = _attrs_by_category(GLOBAL_STAT_CATEGORIES)
+GK_STAT_BY_CATEGORY = _attrs_by_category(GK_STAT_CATEGORIES)
+
 # Default global weights for DWRS rating (field players)
 WEIGHT_DEFAULTS = {
     "Extremely Important": 8.0,
@@ -1,5 +1,6 @@
 # data_parser.py
 
+import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup
 
@@ -7,14 +8,16 @@ try:
     # lxml parses a full 80k-row FM export in seconds; BeautifulSoup takes
     # minutes. BS4 stays as the fallback if lxml is not installed.
     from lxml import html as lxml_html
+    from lxml import etree as lxml_etree
     _HAVE_LXML = True
 except ImportError:
     _HAVE_LXML = False
 from constants import (attribute_mapping, get_valid_roles, ROLE_ANALYSIS_COLUMNS, 
                      PLAYER_ROLE_MATRIX_COLUMNS, )
-from sqlite_db import (init_db, get_all_players, get_latest_dwrs_ratings,
+from sqlite_db import (init_db, get_all_players, get_players_with_role, get_latest_dwrs_ratings,
                        bulk_upsert_players, create_database_backup, merge_player_records,
                        update_player)
+from utils import get_last_names, transfer_values_to_float
 
 import streamlit as st
 
@@ -26,6 +29,22 @@ REQUIRED_COLUMN = "UID"
 # (Pun = goalkeeper Punching tendency — not used by any rating.)
 IGNORED_EXPORT_COLUMNS = {"CON", "Ability", "Position/Role/Duty", "Pun"}
 
+# attribute_mapping is static, so these lookup sets are built once at import
+# instead of on every upload.
+KNOWN_FM_COLUMNS = frozenset(attribute_mapping.keys()) | {'UID'} | IGNORED_EXPORT_COLUMNS
+KNOWN_DB_COLUMNS = frozenset(attribute_mapping.values())
+
+# Low-cardinality text columns that pages filter and group on constantly. As
+# categoricals, equality masks / isin / unique() run on integer codes, and the
+# sorted list of distinct values is simply `.cat.categories`.
+CATEGORICAL_COLUMNS = ("Club", "Position")
+
+def _apply_categorical_dtypes(df):
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
 def _extract_table_lxml(content):
     """Fast table extraction via lxml. Returns (headers, rows) or (None, None)."""
     tree = lxml_html.fromstring(content)
@@ -40,6 +59,33 @@ def _extract_table_lxml(content):
     return headers, rows
 
 
+def _extract_table_lxml_stream(source):
+    """
+    Streaming variant of _extract_table_lxml for file-like uploads: rows are
+    read one <tr> at a time and each parsed element is discarded straight
+    away, so the whole document tree is never held in memory next to the raw
+    bytes. Returns (headers, rows) or (None, None).
+    """
+    table, headers, rows = None, None, []
+    for _, tr in lxml_etree.iterparse(source, events=('end',), tag='tr', html=True,
+                                      encoding='utf-8', recover=True):
+        owner = next(tr.iterancestors('table'), None)
+        if table is None:
+            table = owner
+            headers = [''.join(th.itertext()).strip() for th in tr.iterfind('.//th')]
+        elif owner is table:
+            rows.append([''.join(td.itertext()).strip() for td in tr.iterfind('.//td')])
+        tr.clear()
+        # Drop already-processed siblings so the tree stays O(1) in size.
+        parent = tr.getparent()
+        if parent is not None:
+            while tr.getprevious() is not None:
+                del parent[0]
+    if table is None:
+        return None, None
+    return headers, rows
+
+
 def _extract_table_bs4(content):
     """BeautifulSoup fallback. Returns (headers, rows) or (None, None)."""
     soup = BeautifulSoup(content, 'html.parser')
@@ -56,17 +102,22 @@ def _extract_table_bs4(content):
 
 def parse_html_table(file):
     try:
-        # Support both file-like objects (Streamlit uploads) and raw bytes/strings
-        raw = file.read()
-        if isinstance(raw, bytes):
-            content = raw.decode('utf-8', errors='replace')
+        if _HAVE_LXML and hasattr(file, 'read'):
+            # Streamlit uploads: parse straight from the file object.
+            headers, rows = _extract_table_lxml_stream(file)
         else:
-            content = raw
+            # Support raw bytes/strings too (and the BS4 fallback, which
+            # needs the whole document)
+            raw = file.read() if hasattr(file, 'read') else file
+            if isinstance(raw, bytes):
+                content = raw.decode('utf-8', errors='replace')
+            else:
+                content = raw
 
-        if _HAVE_LXML:
-            headers, rows = _extract_table_lxml(content)
-        else:
-            headers, rows = _extract_table_bs4(content)
+            if _HAVE_LXML:
+                headers, rows = _extract_table_lxml(content)
+            else:
+                headers, rows = _extract_table_bs4(content)
 
         if headers is None:
             print("parse_html_table: No <table> element (or header row) found in file.")
@@ -117,10 +168,16 @@ def parse_html_table(file):
         print(f"parse_html_table: Unexpected error: {e}")
         return None
 
+@st.cache_data
+def _load_players_df():
+    """The full players table as a DataFrame, built once per data change.
+    Cleared together with get_all_players() by clear_all_caches()."""
+    players = get_all_players()
+    return _apply_categorical_dtypes(pd.DataFrame(players)) if players else None
+
 def load_data():
     init_db()
-    players = get_all_players()
-    return pd.DataFrame(players) if players else None
+    return _load_players_df()
 
 
 def parse_and_update_data(file):
@@ -146,8 +203,7 @@ def parse_and_update_data(file):
 
     # Warn the user if the FM view exported unexpected extra columns.
     # (Deduplication already happened inside parse_html_table.)
-    known_fm_columns = set(attribute_mapping.keys()) | {'UID'} | IGNORED_EXPORT_COLUMNS
-    extra_cols = [c for c in html_df.columns if c not in known_fm_columns and '_dup' not in c]
+    extra_cols = [c for c in html_df.columns if c not in KNOWN_FM_COLUMNS and '_dup' not in c]
     if extra_cols:
         st.warning(
             f"⚠️ **Unknown columns in export** (will be ignored): `{', '.join(extra_cols)}`\n\n"
@@ -280,8 +336,7 @@ def parse_and_update_data(file):
 
     # 5. Prepare and save the now-clean data (no changes from here on)
     html_df.rename(columns=attribute_mapping, inplace=True)
-    known_columns = set(attribute_mapping.values())
-    cols_to_keep = [col for col in html_df.columns if col in known_columns or col == 'Unique ID']
+    cols_to_keep = [col for col in html_df.columns if col in KNOWN_DB_COLUMNS or col == 'Unique ID']
     df_filtered = html_df[cols_to_keep]
     APP_MANAGED_COLUMNS = ["Assigned Roles", "primary_role", "natural_positions", "transfer_status", "loan_status"]
     cols_from_html = [col for col in df_filtered.columns if col not in APP_MANAGED_COLUMNS]
@@ -317,11 +372,10 @@ def force_update_single_player(file, target_uid):
 
     html_df = html_df.copy()
     html_df.rename(columns=attribute_mapping, inplace=True)
-    known_columns = set(attribute_mapping.values())
     record = {
         col: html_df.iloc[0][col]
         for col in html_df.columns
-        if col in known_columns
+        if col in KNOWN_DB_COLUMNS
     }
     file_player_name = str(record.get('Name', '')).strip()
     # Everything is keyed to the confirmed target player, not the file's UID.
@@ -332,28 +386,27 @@ def force_update_single_player(file, target_uid):
 
 
 def get_filtered_players(filter_option="Unassigned Players", club_filter="All", position_filter="All", sort_column="Name", sort_ascending=True, user_club=None):
-    players = get_all_players()
-    if not players: return pd.DataFrame()
-    df = pd.DataFrame(players)
+    # Start from the cached base frame; changing only the sort or a filter
+    # no longer rebuilds it from the player dicts.
+    df = _load_players_df()
+    if df is None: return pd.DataFrame()
+    # Length test on the list column instead of a Python lambda per player.
+    unassigned_mask = df['Assigned Roles'].str.len().eq(0)
     if filter_option == "Unassigned Players":
-        df = df[df['Assigned Roles'].apply(lambda x: not x)]
+        df = df[unassigned_mask]
     elif filter_option == "Players Not From My Club" and user_club:
         df = df[df['Club'] != user_club]
     elif filter_option == "Unassigned Players Not From My Club" and user_club:
-        df = df[(df['Club'] != user_club) & (df['Assigned Roles'].apply(lambda x: not x))]
+        df = df[(df['Club'] != user_club) & unassigned_mask]
     if club_filter != "All": df = df[df['Club'] == club_filter]
     if position_filter != "All": df = df[df['Position'] == position_filter]
 
     # Check if the user wants to sort by player name
     if sort_column == "Name":
-        # Helper function to extract the last name
-        def get_last_name(full_name):
-            if isinstance(full_name, str) and full_name:
-                return full_name.split(' ')[-1]
-            return ""
-        
-        # Create a temporary column for the last name, sort by it, then drop it
-        df['LastName'] = df['Name'].apply(get_last_name)
+        # Create a temporary column for the last name, sort by it, then drop it.
+        # The str accessor splits the whole column at once (same result as
+        # full_name.split(' ')[-1] per row, '' for missing names).
+        df['LastName'] = df['Name'].str.rsplit(' ', n=1).str[-1].fillna('')
         return df.sort_values(by=['LastName', 'Name'], ascending=sort_ascending).drop(columns=['LastName'])
     else:
         # For all other columns, sort normally
@@ -364,7 +417,8 @@ def get_players_by_role(role, user_club, second_team_club=None):
     # Import the new, fast data loader
     from sqlite_db import get_latest_dwrs_ratings
 
-    players = get_all_players()
+    # Only players assigned to this role come back from the database.
+    players = get_players_with_role(role)
     empty_df = pd.DataFrame(columns=ROLE_ANALYSIS_COLUMNS)
     if not players: return empty_df, empty_df, empty_df
 
@@ -372,28 +426,20 @@ def get_players_by_role(role, user_club, second_team_club=None):
     all_ratings = get_latest_dwrs_ratings()
     ratings_for_role = all_ratings.get(role, {}) # Get ratings just for the role we want
 
-    # 2. Filter players who can play the role and have a rating for it.
-    players_with_role = []
-    for p in players:
-        if role in p.get('Assigned Roles', []) and p['Unique ID'] in ratings_for_role:
-            player_data = p.copy()
+    # 2. Keep the players that have a rating for it. Ratings are attached as
+    # whole columns rather than by copying and extending each player dict.
+    df = pd.DataFrame(players)
+    df = df[df['Unique ID'].isin(ratings_for_role.keys())]
+    if df.empty: return empty_df, empty_df, empty_df
 
-            absolute_val, normalized_str = ratings_for_role[p['Unique ID']]
-            
-            # Add both columns to the player data
-            player_data['DWRS Rating (Absolute)'] = absolute_val
-            player_data['DWRS Rating (Normalized)'] = normalized_str
-            
-            # We still need a numeric version for sorting
-            try:
-                player_data['DWRS_Sort_Value'] = int(float(normalized_str.rstrip('%')))
-            except (ValueError, TypeError):
-                player_data['DWRS_Sort_Value'] = 0 # Default if data is corrupted
-            players_with_role.append(player_data)
-
-    if not players_with_role: return empty_df, empty_df, empty_df
-    
-    df = pd.DataFrame(players_with_role)
+    rated = [ratings_for_role[uid] for uid in df['Unique ID']]
+    df = df.assign(**{
+        'DWRS Rating (Absolute)': [absolute_val for absolute_val, _ in rated],
+        'DWRS Rating (Normalized)': [normalized_str for _, normalized_str in rated],
+    })
+    # We still need a numeric version for sorting (0 if the data is corrupted)
+    df['DWRS_Sort_Value'] = (pd.to_numeric(df['DWRS Rating (Normalized)'].astype(str).str.rstrip('%'), errors='coerce')
+                             .fillna(0).astype(int))
 
     # 3. Split the DataFrame by club
     my_club_df = df[df['Club'] == user_club]
@@ -415,35 +461,104 @@ def get_players_by_role(role, user_club, second_team_club=None):
 @st.cache_data
 def get_player_role_matrix(user_club=None, second_team_club=None):
     # This uses the same fast, reliable data source as get_players_by_role.
-    # Built via vectorized column maps — the old per-player/per-role nested
-    # loop took ~25 s on an 80k-player database, this takes ~2 s.
+    # The role block is one (players x roles) array: every stored rating is
+    # scattered into it in a single indexed assignment, then cells whose role
+    # is not assigned to the player are masked out (same rule as
+    # get_players_by_role). No per-player or per-role Python work remains.
 
     players = get_all_players()
     if not players:
         return pd.DataFrame()
 
     df = pd.DataFrame(players)
-    matrix = pd.DataFrame({
-        col: (df[col].fillna('') if col in df.columns else '')
-        for col in PLAYER_ROLE_MATRIX_COLUMNS
-    })
+    # Identity columns as one block projection; missing columns come back
+    # empty, exactly like before.
+    matrix = df.reindex(columns=PLAYER_ROLE_MATRIX_COLUMNS).fillna('')
+    # Few distinct nations, clubs and position strings: category codes make
+    # the nationality and club filters integer compares and shrink the
+    # cached frame.
+    category_cols = ['Nationality', 'Second Nationality', 'Club', 'Position']
+    matrix[category_cols] = matrix[category_cols].astype('category')
+    # Flag for the matrix pages' "Hide 'Retired' Players" option, computed
+    # once here (lowercasing each distinct club once) instead of lowercasing
+    # every club name on each rerun.
+    clubs = matrix['Club'].cat
+    matrix['IsRetired'] = (clubs.categories.str.lower() == 'retired')[clubs.codes]
+    # Numeric age for the age filters and sliders (NaN when unparseable)
+    matrix['AgeNum'] = pd.to_numeric(matrix['Age'], errors='coerce')
+    # Numeric transfer value for the value filters and sliders
+    matrix['ValueNum'] = transfer_values_to_float(matrix['Transfer Value'])
+    # Sort key for the name-ordered tables
+    matrix['LastName'] = get_last_names(matrix['Name'])
+    # The same order as integer ranks (equal last names share one), so the
+    # large scouted table sorts numbers instead of strings on every rerun.
+    matrix['LastNameOrder'] = pd.factorize(matrix['LastName'], sort=True)[0].astype(np.int32)
+
+    roles = get_valid_roles()
+    role_index = pd.Index(roles)
+    uid_index = pd.Index(df['Unique ID'])
 
     # 1. Get ALL pre-calculated ratings in one go. This is cached and fast.
     all_ratings = get_latest_dwrs_ratings()
-    uid_series = df['Unique ID']
+    rating_uids, rating_roles, rating_values = [], [], []
+    for role, ratings_for_role in all_ratings.items():
+        rating_uids.extend(ratings_for_role.keys())
+        rating_roles.extend([role] * len(ratings_for_role))
+        rating_values.extend(t[1] for t in ratings_for_role.values())
+
+    # Ratings are whole percentages, exact in float32 (NaN = no rating); half
+    # the bytes of float64 for every scan over the role columns.
+    values = np.full((len(df), len(roles)), np.nan, dtype=np.float32)
+    if rating_uids:
+        rows = uid_index.get_indexer(rating_uids)
+        cols = role_index.get_indexer(rating_roles)
+        parsed = pd.to_numeric(
+            pd.Series(rating_values, dtype=object).astype(str).str.rstrip('%'),
+            errors='coerce'
+        ).to_numpy()
+        known = (rows >= 0) & (cols >= 0)
+        # Stored values are whole percentages; truncate like int(float(...)).
+        values[rows[known], cols[known]] = np.trunc(parsed[known])
+
+    # 2. Mask out ratings for roles the player no longer has assigned.
+    assigned = df['Assigned Roles'].explode()
+    assigned_cols = role_index.get_indexer(assigned)
+    assigned_rows = assigned.index.to_numpy()
+    valid = assigned_cols >= 0
+    mask = np.zeros(values.shape, dtype=bool)
+    mask[assigned_rows[valid], assigned_cols[valid]] = True
+    values[~mask] = np.nan
+
+    roles_df = pd.DataFrame(values, columns=roles, index=matrix.index)
+    return pd.concat([matrix, roles_df], axis=1)
 
-    def _norm_to_int(rating_tuple):
-        try:
-            return int(float(rating_tuple[1].rstrip('%')))
-        except (ValueError, AttributeError, TypeError, IndexError):
-            return None
+@st.cache_data
+def get_eligible_national_ids(nat_code, nat_age):
+    """
+    Unique IDs of the players eligible for the national team: first or second
+    nationality is nat_code and, for youth sides (age limit below 99), age is
+    at most nat_age. Cached per team setting so the national pages select
+    the pool with an .isin() instead of re-filtering on every rerun.
+    """
+    players = get_all_players()
+    if not players:
+        return frozenset()
 
-    for role in get_valid_roles():
-        ratings_for_role = all_ratings.get(role)
-        if not ratings_for_role:
-            matrix[role] = None
-            continue
-        mapping = {uid: _norm_to_int(t) for uid, t in ratings_for_role.items()}
-        matrix[role] = uid_series.map(mapping)
+    df = pd.DataFrame(players, columns=['Unique ID', 'Nationality', 'Second Nationality', 'Age'])
+    eligible = (df['Nationality'] == nat_code) | (df['Second Nationality'] == nat_code)
+    if nat_age < 99:
+        eligible &= pd.to_numeric(df['Age'], errors='coerce') <= nat_age
+    return frozenset(df.loc[eligible, 'Unique ID'])
 
-    return matrix
\ No newline at end of file
+@st.cache_data
+def get_squad_role_best(squad_ids):
+    """
+    Best rating per role among the given players (0 where none of them is
+    rated), as a Series indexed by role. Cached on the sorted ID tuple: the
+    National Dashboard's call-up sliders only change the candidate pool.
+    """
+    matrix = get_player_role_matrix()
+    if matrix.empty:
+        return pd.Series(dtype='float32')
+    roles = [role for role in get_valid_roles() if role in matrix.columns]
+    return matrix.loc[matrix['Unique ID'].isin(squad_ids), roles].max().fillna(0)
@@ -1,20 +1,31 @@
 # src/definitions_handler.py
 
+import copy
 import json
 import os
 import streamlit as st
-import shutil # For file backups
 
-from definitions_loader import PROJECT_ROOT
+from definitions_loader import PROJECT_ROOT, read_json_file
 
 # Build the absolute path to the definitions file
 DEFINITIONS_FILE = os.path.join(PROJECT_ROOT, 'config', 'definitions.json')
 
+# Parsed file contents keyed on its modification time. The editor pages call
+# get_definitions() on every rerun, but the file only changes when saved.
+_definitions_cache = {'mtime': None, 'data': None}
+
 def get_definitions():
-    """Loads the raw definitions file without caching."""
+    """
+    Loads the raw definitions file, bypassing st.cache_data. The file is only
+    re-parsed when its mtime changed; callers get a deep copy because they
+    edit the result in place before saving it.
+    """
     try:
-        with open(DEFINITIONS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        mtime = os.path.getmtime(DEFINITIONS_FILE)
+        if _definitions_cache['mtime'] != mtime:
+            _definitions_cache['data'] = read_json_file(DEFINITIONS_FILE)
+            _definitions_cache['mtime'] = mtime
+        return copy.deepcopy(_definitions_cache['data'])
     except Exception:
         # Fallback to the cached loader if direct reading fails during an operation
         from definitions_loader import load_definitions
@@ -23,24 +34,24 @@ def get_definitions():
 def save_definitions(data):
     """
     Safely writes the updated definitions data to the JSON file.
-    Creates a backup before writing.
+    The data goes to a temporary file first, which then atomically replaces
+    the original, so a crash mid-write can never leave a truncated file.
     """
-    backup_file = DEFINITIONS_FILE + '.bak'
+    tmp_file = DEFINITIONS_FILE + '.tmp'
     try:
-        # 1. Create a backup
-        shutil.copy(DEFINITIONS_FILE, backup_file)
-
-        # 2. Write the new data
-        with open(DEFINITIONS_FILE, 'w', encoding='utf-8') as f:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4)
-        
-        # 3. If write is successful, remove the backup
-        if os.path.exists(backup_file):
-            os.remove(backup_file)
-            
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, DEFINITIONS_FILE)
+
+        # Keep the in-memory copy in step with what was just written
+        _definitions_cache['data'] = copy.deepcopy(data)
+        _definitions_cache['mtime'] = os.path.getmtime(DEFINITIONS_FILE)
+
         return True, "Successfully saved definitions."
     except Exception as e:
-        # If something goes wrong, restore from backup
-        if os.path.exists(backup_file):
-            shutil.copy(backup_file, DEFINITIONS_FILE)
-        return False, f"An error occurred: {e}. Restored from backup."
\ No newline at end of file
+        # The original file is untouched; only the partial temp file is left.
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return False, f"An error occurred: {e}. The definitions file was not changed."
@@ -33,8 +33,8 @@ def assign_roles_page(df):
 
     # The 'key' argument automatically links the widget's state to st.session_state
     filter_option = c1.selectbox("Filter by", options=FILTER_OPTIONS, key='ar_filter_option')
-    club_filter = c2.selectbox("Filter by Club", options=["All"] + sorted(df['Club'].unique()), key='ar_club_filter')
-    pos_filter = c3.selectbox("Filter by Position", options=["All"] + sorted(df['Position'].unique()), key='ar_pos_filter')
+    club_filter = c2.selectbox("Filter by Club", options=["All"] + list(df['Club'].cat.categories), key='ar_club_filter')
+    pos_filter = c3.selectbox("Filter by Position", options=["All"] + list(df['Position'].cat.categories), key='ar_pos_filter')
     sort_column = c1.selectbox("Sort by", options=SORTABLE_COLUMNS, key='ar_sort_column')
     sort_order = c2.selectbox("Sort Order", options=["Ascending", "Descending"], key='ar_sort_order')
     search = st.text_input("Search by Name", key='ar_search')
@@ -71,16 +71,34 @@ def assign_roles_page(df):
             st.rerun()
         else: st.info("No changes to apply.")
 
+    def default_roles_by_player(players_df):
+        """{Unique ID: sorted default roles} derived from each player's
+        position string. Position strings repeat heavily, so each distinct
+        string is parsed and mapped only once."""
+        pos_to_roles = get_position_to_role_mapping()
+        roles_for_position_str = {}
+        default_roles = {}
+        for uid, pos_str in players_df[['Unique ID', 'Position']].itertuples(index=False, name=None):
+            if pos_str not in roles_for_position_str:
+                roles_for_position_str[pos_str] = sorted(
+                    set(r for pos in parse_position_string(pos_str) for r in pos_to_roles.get(pos, []))
+                )
+            default_roles[uid] = roles_for_position_str[pos_str]
+        return default_roles
+
     st.subheader("Automatic Role Assignment")
     c1, c2 = st.columns(2)
     if c1.button("Auto-Assign to Unassigned Players"):
-        unassigned = df[df['Assigned Roles'].apply(lambda x: not x)]
-        changes = {p['Unique ID']: sorted(list(set(r for pos in parse_position_string(p['Position']) for r in get_position_to_role_mapping().get(pos, [])))) for _, p in unassigned.iterrows()}
+        unassigned = df[df['Assigned Roles'].str.len().eq(0)]
+        changes = default_roles_by_player(unassigned)
         handle_role_update({k: v for k, v in changes.items() if v})
     if c2.button("⚠️ Auto-Assign to ALL Players"):
-        changes = {p['Unique ID']: sorted(list(set(r for pos in parse_position_string(p['Position']) for r in get_position_to_role_mapping().get(pos, [])))) for _, p in df.iterrows()}
+        changes = default_roles_by_player(df)
+        # O(1) lookup of each player's current roles instead of a full
+        # DataFrame scan per changed player.
+        current_roles = dict(zip(df['Unique ID'], df['Assigned Roles']))
         def _roles_unchanged(uid, new_roles):
-            existing = df[df['Unique ID'] == uid]['Assigned Roles'].iloc[0]
+            existing = current_roles.get(uid)
             try:
                 return set(new_roles) == set(existing) if isinstance(existing, list) else False
             except TypeError:
@@ -90,8 +108,8 @@ def assign_roles_page(df):
     st.subheader("Assign/Edit Roles Individually")
     st.dataframe(filtered_df[['Name', 'Position', 'Club', 'Assigned Roles']], use_container_width=True, hide_index=True)
     changes = {}
-    for _, row in filtered_df.iterrows():
-        new = st.multiselect(f"Roles for {row['Name']} ({row['Position']})", options=get_valid_roles(), default=row['Assigned Roles'], key=f"roles_{row['Unique ID']}", format_func=format_role_display)
-        #new = st.multiselect(f"Roles for {row['Name']}", options=get_valid_roles(), default=row['Assigned Roles'], key=f"roles_{row['Unique ID']}", format_func=format_role_display)
-        if new != row['Assigned Roles']: changes[row['Unique ID']] = new
+    valid_roles = get_valid_roles()
+    for uid, name, position, assigned in zip(filtered_df['Unique ID'], filtered_df['Name'], filtered_df['Position'], filtered_df['Assigned Roles']):
+        new = st.multiselect(f"Roles for {name} ({position})", options=valid_roles, default=assigned, key=f"roles_{uid}", format_func=format_role_display)
+        if new != assigned: changes[uid] = new
     if st.button("Save All Individual Changes"): handle_role_update(changes)
\ No newline at end of file
@@ -3,12 +3,12 @@
 import streamlit as st
 import pandas as pd
 
-from constants import get_tactic_roles, get_tactic_layouts
+from constants import get_tactic_roles, get_tactic_layouts, get_sorted_tactic_names
 from sqlite_db import get_user_club, get_second_team_club, get_favorite_tactics
 from config_handler import get_theme_settings
 from ui_components import display_tactic_grid, display_custom_header
 from squad_logic import get_cached_squad_analysis, create_detailed_surplus_df
-from utils import get_natural_role_sorter
+from utils import get_natural_role_sorter, sort_tactics_favorites_first
 
 def best_position_calculator_page(players):
     #st.title("Best Position Calculator")
@@ -22,12 +22,8 @@ def best_position_calculator_page(players):
 
     # Tactic selection
     fav_tactic1, fav_tactic2 = get_favorite_tactics()
-    all_tactics = sorted(list(get_tactic_roles().keys()))
-    sorted_tactics = []
-    if fav_tactic1 and fav_tactic1 in all_tactics: sorted_tactics.append(fav_tactic1)
-    if fav_tactic2 and fav_tactic2 in all_tactics and fav_tactic2 != fav_tactic1: sorted_tactics.append(fav_tactic2)
-    for tactic in all_tactics:
-        if tactic not in sorted_tactics: sorted_tactics.append(tactic)
+    all_tactics = get_sorted_tactic_names()
+    sorted_tactics = sort_tactics_favorites_first(fav_tactic1, fav_tactic2, all_tactics)
     tactic = st.selectbox("Select Tactic", options=sorted_tactics, index=0)
     
     positions, layout = get_tactic_roles()[tactic], get_tactic_layouts()[tactic]
@@ -37,7 +33,7 @@ def best_position_calculator_page(players):
     # --- EFFICIENT CALCULATION STEP ---
     analysis_results = None
     with st.spinner("Analyzing squad structure..."):
-        analysis_results = get_cached_squad_analysis(players, tactic, user_club, second_team_club)
+        analysis_results = get_cached_squad_analysis(tactic, user_club, second_team_club)
 
     if not analysis_results:
         st.warning(f"Could not generate a squad for the '{tactic}' tactic. There may be no suitable players in your club.")
@@ -1,14 +1,33 @@
 # dwrs_progress.py
 
+import numpy as np
 import streamlit as st
 import pandas as pd
 
-from sqlite_db import (get_user_club, get_dwrs_history, get_favorite_tactics,
-                       get_national_squad_ids, get_national_favorite_tactics)
-from constants import get_valid_roles, get_tactic_roles
-from utils import format_role_display, get_last_name, is_national_mode_active
+from sqlite_db import (get_user_club, get_dwrs_history, get_dwrs_history_bulk, get_favorite_tactics,
+                       get_club_players, get_national_squad_players, get_national_favorite_tactics)
+from constants import get_valid_roles, get_tactic_roles, get_sorted_tactic_names
+from utils import format_role_display, get_last_names, is_national_mode_active
 from ui_components import display_custom_header
 
+def _forward_interpolate(frame):
+    """
+    Same result as frame.interpolate(method='linear', limit_direction='forward',
+    axis=0): gaps between snapshots are filled linearly by position, values
+    after a column's last snapshot repeat it, and leading gaps stay empty.
+    Done column by column with np.interp on one preallocated float32 block.
+    """
+    values = frame.to_numpy(dtype=np.float32, copy=True, na_value=np.nan)
+    positions = np.arange(values.shape[0])
+    for j in range(values.shape[1]):
+        col = values[:, j]
+        valid = ~np.isnan(col)
+        if not valid.any():
+            continue
+        start = np.argmax(valid)
+        col[start:] = np.interp(positions[start:], positions[valid], col[valid])
+    return pd.DataFrame(values, index=frame.index, columns=frame.columns)
+
 def dwrs_progress_page(players):
     #st.title("DWRS Player Development")
     display_custom_header("DWRS Player Development")
@@ -16,18 +35,29 @@ def dwrs_progress_page(players):
 
     national_mode = is_national_mode_active()
     if national_mode:
-        squad_ids = get_national_squad_ids()
-        all_players = [p for p in players if p['Unique ID'] in squad_ids]
+        all_players = get_national_squad_players()
         if not all_players:
             st.warning("No players in the national squad yet. Go to 'National Squad' to build your team.")
             return
     else:
         user_club = get_user_club()
-        all_players = [p for p in players if p['Club'] == user_club]
+        all_players = get_club_players(user_club)
         if not all_players:
             st.warning("No players found for your club. Please select your club in the sidebar.")
             return
 
+    # Columnar view of the squad, built once per render. The role -> player
+    # index comes from one explode/groupby instead of per-role scans of the
+    # player dicts, and the filters below work on these columns.
+    squad_df = pd.DataFrame(all_players, dtype=object)
+    # Each role's player IDs are kept in squad order, so a role's pool can be
+    # read straight off the index without rescanning the squad.
+    assigned = (squad_df[['Unique ID', 'Assigned Roles']].explode('Assigned Roles')
+                .dropna(subset=['Assigned Roles']).drop_duplicates())
+    role_to_ids = assigned.groupby('Assigned Roles', sort=False)['Unique ID'].agg(list).to_dict()
+    # "Name (Age)" label per player, built once for every picker and legend
+    display_by_id = dict(zip(squad_df['Unique ID'], squad_df['Name'] + ' (' + squad_df['Age'].astype(str) + ')'))
+
     # Favorite tactics differ per mode
     get_fav_tactics = get_national_favorite_tactics if national_mode else get_favorite_tactics
 
@@ -43,7 +73,7 @@ def dwrs_progress_page(players):
     # --- PRONG 1: SQUAD OVERVIEW (COMPLETELY REBUILT) ---
     if analysis_mode == "Squad Overview (by Role)":
         fav_tactic1, _ = get_fav_tactics()
-        all_tactics = ["All Roles"] + sorted(list(get_tactic_roles().keys()))
+        all_tactics = ["All Roles"] + get_sorted_tactic_names()
         tactic_index = all_tactics.index(fav_tactic1) if fav_tactic1 in all_tactics else 0
         selected_tactic = st.selectbox(
             "Select a Tactic to Analyze its Roles",
@@ -70,30 +100,25 @@ def dwrs_progress_page(players):
             return
 
         with st.spinner("Aggregating squad development data by role..."):
-            all_history_dfs = []
-            for role in selected_roles:
-                # 1. Find all players in your club who have this role assigned
-                player_ids_for_role = {p['Unique ID'] for p in all_players if role in p.get('Assigned Roles', [])}
-                
-                if not player_ids_for_role:
-                    continue # Skip this role if no players can play it
-
-                # 2. Get the historical DWRS data for these players IN THIS SPECIFIC ROLE
-                history_df = get_dwrs_history(list(player_ids_for_role), role)
-                
-                if history_df.empty:
-                    continue
-
-                # 3. Calculate the squad's average DWRS for this role at each snapshot
-                history_df['dwrs_normalized'] = pd.to_numeric(history_df['dwrs_normalized'].str.rstrip('%'))
-                avg_progress = history_df.groupby('snapshot')['dwrs_normalized'].mean()
-                
-                # 4. Rename the series for a clean chart legend
-                avg_progress = avg_progress.rename(format_role_display(role))
-                all_history_dfs.append(avg_progress)
-
-        if all_history_dfs:
-            chart_data = pd.concat(all_history_dfs, axis=1).interpolate(method='linear', limit_direction='forward', axis=0)
+            # 1. Roles that at least one squad player has assigned
+            roles_with_players = [role for role in selected_roles if role_to_ids.get(role)]
+
+            chart_data = None
+            if roles_with_players:
+                # 2. Historical DWRS for exactly the assigned (player, role)
+                # pairs, fetched in a single query
+                pairs = [(uid, role) for role in roles_with_players for uid in role_to_ids[role]]
+                history_df = get_dwrs_history_bulk(pairs)
+
+                if not history_df.empty:
+                    # 3. The squad's average DWRS per role at each snapshot, all roles at once
+                    avg_progress = history_df.groupby(['role', 'snapshot'])['dwrs_normalized'].mean().unstack('role')
+
+                    # 4. Keep the selection order and rename for a clean chart legend
+                    avg_progress = avg_progress[[role for role in roles_with_players if role in avg_progress.columns]]
+                    chart_data = _forward_interpolate(avg_progress.rename(columns=format_role_display))
+
+        if chart_data is not None:
             st.subheader(f"Average Squad DWRS Progression for Roles in '{selected_tactic}'")
             st.line_chart(chart_data)
         else:
@@ -104,7 +129,7 @@ def dwrs_progress_page(players):
         c1, c2 = st.columns(2)
         with c1:
             fav_tactic1, _ = get_fav_tactics()
-            all_tactics = ["All Roles"] + sorted(list(get_tactic_roles().keys()))
+            all_tactics = ["All Roles"] + get_sorted_tactic_names()
             tactic_index = all_tactics.index(fav_tactic1) if fav_tactic1 in all_tactics else 0
             selected_tactic = st.selectbox("Filter by Tactic", options=all_tactics, index=tactic_index)
         with c2:
@@ -114,8 +139,7 @@ def dwrs_progress_page(players):
                 role_options = sorted(list(set(get_tactic_roles()[selected_tactic].values())))
             selected_role = st.selectbox("Filter by Role", options=role_options, format_func=format_role_display)
 
-        player_pool = [p for p in all_players if selected_role in p.get('Assigned Roles', [])]
-        player_map = {p['Unique ID']: f"{p['Name']} ({p['Age']})" for p in player_pool}
+        player_map = {uid: display_by_id[uid] for uid in role_to_ids.get(selected_role, ())}
 
         if not player_map:
             st.warning(f"No players in your club have the role '{format_role_display(selected_role)}' assigned.")
@@ -126,9 +150,13 @@ def dwrs_progress_page(players):
         if selected_ids and selected_role:
             history = get_dwrs_history(selected_ids, selected_role)
             if not history.empty:
-                history['dwrs_normalized'] = pd.to_numeric(history['dwrs_normalized'].str.rstrip('%'))
-                history['DisplayName'] = history['unique_id'].map(player_map)
-                pivot = history.pivot_table(index='snapshot', columns='DisplayName', values='dwrs_normalized', aggfunc='mean').interpolate(method='linear', limit_direction='forward', axis=0)
+                # Pivot on the ID and label the columns once, rather than mapping a name onto every row
+                pivot = history.pivot_table(index='snapshot', columns='unique_id', values='dwrs_normalized', aggfunc='mean')
+                pivot = pivot.rename(columns=player_map)
+                if pivot.columns.has_duplicates:
+                    # Same name and age: average them, as grouping by display name did
+                    pivot = pivot.T.groupby(level=0, sort=False).mean().T
+                pivot = _forward_interpolate(pivot)
                 st.subheader(f"Development as {format_role_display(selected_role)}")
                 st.line_chart(pivot)
             else:
@@ -140,10 +168,15 @@ def dwrs_progress_page(players):
     elif analysis_mode == "Individual Player (deep dive)":
         c1, c2 = st.columns(2)
         with c1:
-            player_names = sorted([p['Name'] for p in all_players], key=get_last_name)
+            last_names = get_last_names(squad_df['Name'])
+            player_names = squad_df['Name'].iloc[last_names.argsort(kind='stable')].tolist()
             selected_name = st.selectbox("Select a player", options=player_names)
         
-        player_obj = next((p for p in all_players if p['Name'] == selected_name), None)
+        # First match wins for duplicate names, as with the old linear scan
+        players_by_name = {}
+        for p in all_players:
+            players_by_name.setdefault(p['Name'], p)
+        player_obj = players_by_name.get(selected_name)
         
         with c2:
             if player_obj:
@@ -157,17 +190,20 @@ def dwrs_progress_page(players):
                 selected_roles = []
 
         if player_obj and selected_roles:
-            player_id_to_chart = [player_obj['Unique ID']]
-            history_dfs = []
-            for role in selected_roles:
-                history = get_dwrs_history(player_id_to_chart, role)
-                if not history.empty:
-                    history['dwrs_normalized'] = pd.to_numeric(history['dwrs_normalized'].str.rstrip('%'))
-                    history = history.rename(columns={'dwrs_normalized': format_role_display(role)})
-                    history_dfs.append(history.set_index('snapshot')[format_role_display(role)])
-
-            if history_dfs:
-                chart_data = pd.concat(history_dfs, axis=1).interpolate(method='linear', limit_direction='forward', axis=0)
+            # All selected roles in one query, pivoted straight into chart columns
+            history = get_dwrs_history_bulk([(player_obj['Unique ID'], role) for role in selected_roles])
+
+            if not history.empty:
+                if len(selected_roles) == 1:
+                    # One role numbers its own snapshots 1..n, so there are no
+                    # gaps to pivot around or interpolate (bar unparseable ratings).
+                    chart_data = history.groupby('snapshot')['dwrs_normalized'].mean().to_frame(format_role_display(selected_roles[0]))
+                    if chart_data.iloc[:, 0].isna().any():
+                        chart_data = _forward_interpolate(chart_data)
+                else:
+                    chart_data = history.pivot_table(index='snapshot', columns='role', values='dwrs_normalized', aggfunc='mean')
+                    chart_data = chart_data[[role for role in selected_roles if role in chart_data.columns]]
+                    chart_data = _forward_interpolate(chart_data.rename(columns=format_role_display))
                 st.subheader(f"Development for {selected_name}")
                 st.line_chart(chart_data)
             else:
@@ -1,11 +1,55 @@
 # edit_player.py
 
+import numpy as np
+import pandas as pd
 import streamlit as st
-from sqlite_db import (get_user_club, update_player_club, update_player_apt, 
+from sqlite_db import (get_user_club, get_all_players, get_club_players, get_player_by_id, update_player_club, update_player_apt, 
                        update_player_natural_positions, set_primary_role, update_player_preferred_side)
 from utils import get_last_name, format_role_display, parse_position_string
 from constants import GK_APT_OPTIONS, FIELD_PLAYER_APT_OPTIONS
-from ui_components import clear_all_caches, display_custom_header
+from ui_components import clear_player_data_caches, display_custom_header, register_player_data_cache
+
+DROPDOWN_PLACEHOLDER = "--- Select a Player ---"
+
+# Marker suffix for every combination of (no primary role, no APT, no natural
+# positions), indexed by the 3-bit code built in _club_dropdown.
+_MARKER_SUFFIXES = np.array([
+    (" " + " ".join(m for m, flag in zip(('🎯', '📄', '📍'), (code & 4, code & 2, code & 1)) if flag)) if code else ""
+    for code in range(8)
+], dtype=object)
+
+@register_player_data_cache
+@st.cache_data
+def _sorted_club_players(club):
+    """Club players ordered by last name. Cached per club, so the sort only
+    reruns when player data changes (cache clears), not on every widget
+    interaction."""
+    return sorted(get_club_players(club), key=lambda p: get_last_name(p['Name']))
+
+@register_player_data_cache
+@st.cache_data
+def _club_dropdown(club):
+    """(dropdown_options, display name -> Unique ID) for the club roster.
+    The missing-data markers are picked for all players at once from three
+    boolean columns; cached per club, so typing in the search box or editing
+    widgets below does not rebuild the list."""
+    players = _sorted_club_players(club)
+    if not players:
+        return [DROPDOWN_PLACEHOLDER], {}
+    df = pd.DataFrame(players, dtype=object)
+    no_role = ~df['primary_role'].fillna('').astype(bool).to_numpy()
+    no_apt = ~df['Agreed Playing Time'].fillna('').astype(bool).to_numpy()
+    no_positions = df['natural_positions'].str.len().fillna(0).eq(0).to_numpy()
+    codes = no_role * 4 + no_apt * 2 + no_positions
+    display_names = (df['Name'].astype(str) + _MARKER_SUFFIXES[codes]).tolist()
+    return [DROPDOWN_PLACEHOLDER] + display_names, dict(zip(display_names, df['Unique ID']))
+
+@register_player_data_cache
+@st.cache_data
+def _lowercase_player_names():
+    """Lower-cased names of get_all_players(), in the same order, for the
+    substring search. Built once per data change instead of per keystroke."""
+    return np.array([(p.get('Name') or '').lower() for p in get_all_players()], dtype=str)
 
 def edit_player_data_page(players):
     #st.title("Edit Player Data")
@@ -25,7 +69,7 @@ def edit_player_data_page(players):
     # One-shot preselection coming from the global player search (sidebar):
     # if a target player was set, edit him unless the user picks another below.
     forced_uid = st.session_state.pop("edit_target_uid", None)
-    forced_player = next((p for p in all_players if p['Unique ID'] == forced_uid), None) if forced_uid else None
+    forced_player = get_player_by_id(forced_uid) if forced_uid else None
 
     # --- Player Selection Section (remains full-width at the top) ---
     c1, c2 = st.columns([1, 1]) # Use columns to neatly separate the two selection methods
@@ -33,24 +77,15 @@ def edit_player_data_page(players):
         st.subheader("Select Player from Your Club")
         st.caption("Marked with: 🎯 Primary Role, 📄 APT, 📍 Natural Pos.")
         
-        my_club_players = sorted([p for p in all_players if p['Club'] == user_club], key=lambda p: get_last_name(p['Name']))
+        my_club_players = _sorted_club_players(user_club)
+        club_players_by_id = {p['Unique ID']: p for p in my_club_players}
         
-        player_options_map = {}
-        dropdown_options = ["--- Select a Player ---"]
-        for player in my_club_players:
-            markers = []
-            if not bool(player.get('primary_role')): markers.append('🎯')
-            if not bool(player.get('Agreed Playing Time')): markers.append('📄')
-            if not bool(player.get('natural_positions')): markers.append('📍')
-            marker = f" {' '.join(markers)}" if markers else ""
-            display_name = f"{player['Name']}{marker}"
-            dropdown_options.append(display_name)
-            player_options_map[display_name] = player['Unique ID']
+        dropdown_options, player_options_map = _club_dropdown(user_club)
 
         selected_dropdown_option = st.selectbox("My Club Players", options=dropdown_options, index=0, label_visibility="collapsed")
-        if selected_dropdown_option != "--- Select a Player ---":
+        if selected_dropdown_option != DROPDOWN_PLACEHOLDER:
             player_id = player_options_map[selected_dropdown_option]
-            player_to_edit = next((p for p in all_players if p['Unique ID'] == player_id), None)
+            player_to_edit = club_players_by_id.get(player_id)
 
     with c2:
         st.subheader("Or, Search All Players")
@@ -58,7 +93,10 @@ def edit_player_data_page(players):
         
         search = st.text_input("Search for a player by name", label_visibility="collapsed")
         if search and not player_to_edit:
-            results = [p for p in all_players if search.lower() in p['Name'].lower()]
+            # Indices into get_all_players(), the list the names were built from
+            searchable_players = get_all_players()
+            matches = np.flatnonzero(np.char.find(_lowercase_player_names(), search.lower()) >= 0)
+            results = [searchable_players[i] for i in matches]
             if results:
                 search_options_map = {f"{p['Name']} ({p['Club']})": p for p in results}
                 selected_search_option = st.selectbox("Select a player from search results", options=list(search_options_map.keys()))
@@ -88,7 +126,7 @@ def edit_player_data_page(players):
             new_club = st.text_input("Club", value=player['Club'], key=f"club_{player['Unique ID']}")
             if st.button("Save Club Change"):
                 update_player_club(player['Unique ID'], new_club)
-                clear_all_caches()
+                clear_player_data_caches()
                 st.success(f"Updated club to '{new_club}'.")
                 st.rerun()
 
@@ -102,7 +140,7 @@ def edit_player_data_page(players):
                 if st.button("Save Playing Time"):
                     value_to_save = None if new_apt == "None" else new_apt
                     update_player_apt(player['Unique ID'], value_to_save)
-                    clear_all_caches()
+                    clear_player_data_caches()
                     st.success(f"Set Agreed Playing Time to '{new_apt}'.")
                     st.rerun()
 
@@ -126,7 +164,7 @@ def edit_player_data_page(players):
                     )
                     if st.button("Save Natural Positions"):
                         update_player_natural_positions(player['Unique ID'], new_natural_positions)
-                        clear_all_caches()
+                        clear_player_data_caches()
                         st.success(f"Updated natural positions for {player['Name']}.")
                         st.rerun()
                 else:
@@ -139,7 +177,7 @@ def edit_player_data_page(players):
                 new_role = st.selectbox("Primary Role", role_options, index=role_index, format_func=lambda x: "None" if x == "None" else format_role_display(x), key=f"role_{player['Unique ID']}")
                 if st.button("Save Primary Role"):
                     set_primary_role(player['Unique ID'], new_role if new_role != "None" else None)
-                    clear_all_caches()
+                    clear_player_data_caches()
                     st.success(f"Set primary role to {new_role}.")
                     st.rerun()
                 
@@ -160,6 +198,6 @@ def edit_player_data_page(players):
                     # Save None if "None" is selected, otherwise save the value
                     value_to_save = None if new_side == "None" else new_side
                     update_player_preferred_side(player['Unique ID'], value_to_save)
-                    clear_all_caches()
+                    clear_player_data_caches()
                     st.success(f"Set preferred side to '{new_side}'.")
                     st.rerun()
\ No newline at end of file
@@ -3,12 +3,12 @@
 import streamlit as st
 import pandas as pd
 
-from constants import get_tactic_roles, get_tactic_layouts
+from constants import get_tactic_roles, get_tactic_layouts, get_sorted_tactic_names
 from sqlite_db import get_user_club, get_second_team_club, get_favorite_tactics
 from config_handler import (get_theme_settings, get_gap_analysis_setting)
 from squad_logic import get_cached_squad_analysis
 from gap_analysis_logic import analyze_team_gaps
-from utils import format_role_display
+from utils import format_role_display, sort_tactics_favorites_first
 from ui_components import display_custom_header
 
 
@@ -142,18 +142,11 @@ def gap_analysis_page(players):
 
     # Tactic selection — favorites first, matching the Best XI page
     fav_tactic1, fav_tactic2 = get_favorite_tactics()
-    all_tactics = sorted(list(get_tactic_roles().keys()))
+    all_tactics = get_sorted_tactic_names()
     if not all_tactics:
         st.warning("No tactics defined yet.")
         return
-    sorted_tactics = []
-    if fav_tactic1 and fav_tactic1 in all_tactics:
-        sorted_tactics.append(fav_tactic1)
-    if fav_tactic2 and fav_tactic2 in all_tactics and fav_tactic2 != fav_tactic1:
-        sorted_tactics.append(fav_tactic2)
-    for t in all_tactics:
-        if t not in sorted_tactics:
-            sorted_tactics.append(t)
+    sorted_tactics = sort_tactics_favorites_first(fav_tactic1, fav_tactic2, all_tactics)
     tactic = st.selectbox("Select Tactic", options=sorted_tactics, index=0)
 
     positions = get_tactic_roles()[tactic]
@@ -172,7 +165,7 @@ def gap_analysis_page(players):
     )
 
     with st.spinner("Analyzing squad structure..."):
-        analysis = get_cached_squad_analysis(players, tactic, user_club, second_team_club)
+        analysis = get_cached_squad_analysis(tactic, user_club, second_team_club)
 
     if not analysis:
         st.warning(f"Could not analyze the '{tactic}' tactic — no suitable players found.")
@@ -3,12 +3,12 @@
 import streamlit as st
 import pandas as pd
 
-from constants import get_tactic_roles, get_tactic_layouts
-from sqlite_db import get_national_team_settings, get_national_squad_ids, get_national_favorite_tactics
+from constants import get_tactic_roles, get_tactic_layouts, get_sorted_tactic_names
+from sqlite_db import get_national_team_settings, get_national_squad_players, get_national_favorite_tactics
 from config_handler import get_theme_settings
 from ui_components import display_tactic_grid, display_custom_header
-from squad_logic import calculate_squad_and_surplus, get_master_role_ratings
-from utils import get_natural_role_sorter, format_role_display
+from squad_logic import get_cached_national_squad_analysis
+from utils import get_natural_role_sorter, format_role_display, sort_tactics_favorites_first
 
 def national_best_xi_page(players):
     """
@@ -22,22 +22,16 @@ def national_best_xi_page(players):
         st.warning("Please configure your national team details in Settings to use this page.")
         return
 
-    # Filter the master player list to only include players from the national squad
-    squad_ids = get_national_squad_ids()
-    if not squad_ids:
+    # Only the players in the national squad (joined in SQL, cached)
+    squad_players = get_national_squad_players()
+    if not squad_players:
         st.info("No players have been selected for the squad. Go to 'National Squad Selection' to build your team.")
         return
-        
-    squad_players = [p for p in players if p['Unique ID'] in squad_ids]
     
     # --- 2. TACTIC SELECTION ---
     fav_tactic1, fav_tactic2 = get_national_favorite_tactics()
-    all_tactics = sorted(list(get_tactic_roles().keys()))
-    sorted_tactics = []
-    if fav_tactic1 and fav_tactic1 in all_tactics: sorted_tactics.append(fav_tactic1)
-    if fav_tactic2 and fav_tactic2 in all_tactics and fav_tactic2 != fav_tactic1: sorted_tactics.append(fav_tactic2)
-    for tactic in all_tactics:
-        if tactic not in sorted_tactics: sorted_tactics.append(tactic)
+    all_tactics = get_sorted_tactic_names()
+    sorted_tactics = sort_tactics_favorites_first(fav_tactic1, fav_tactic2, all_tactics)
     
     tactic = st.selectbox("Select Tactic", options=sorted_tactics, index=0)
     
@@ -49,13 +43,8 @@ def national_best_xi_page(players):
     # --- 3. CORE CALCULATION ---
     squad_analysis = None
     with st.spinner("Calculating best lineup for the national squad..."):
-        # Get the master dictionary of pre-calculated DWRS ratings
-        master_role_ratings = get_master_role_ratings()
-
-        # REUSE the core logic from squad_logic, feeding it our national player pool.
-        # apply_apt_weight=False: a player's Agreed Playing Time belongs to his
-        # club and must not skew national team selection.
-        squad_analysis = calculate_squad_and_surplus(squad_players, positions, master_role_ratings, apply_apt_weight=False)
+        squad_ids = tuple(sorted(p['Unique ID'] for p in squad_players))
+        squad_analysis = get_cached_national_squad_analysis(tactic, squad_ids)
 
     if not squad_analysis:
         st.error("Could not generate a squad. Ensure players are assigned relevant roles.")
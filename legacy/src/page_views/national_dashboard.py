@@ -6,10 +6,11 @@ import pandas as pd
 from ui_components import display_custom_header, display_strength_grid, clear_all_caches, display_player_table
 from sqlite_db import (get_national_team_settings, get_national_squad_ids, get_national_favorite_tactics, 
                        update_dwrs_ratings, set_national_squad_ids)
-from data_parser import parse_and_update_data, get_player_role_matrix, load_data
+from data_parser import (parse_and_update_data, get_player_role_matrix, load_data, get_eligible_national_ids,
+                         get_squad_role_best)
 from role_logic import auto_assign_roles_to_unassigned
-from squad_logic import calculate_squad_and_surplus, get_master_role_ratings
-from constants import get_tactic_roles, get_valid_roles
+from squad_logic import get_cached_national_squad_analysis, calculate_positional_strengths
+from constants import get_tactic_roles, get_valid_roles, get_sorted_tactic_names
 from utils import format_role_display
 from config_handler import save_theme_settings, get_theme_settings
 
@@ -23,8 +24,6 @@ def national_dashboard_page(df, players):
         return
 
     squad_ids = get_national_squad_ids()
-    squad_players = [p for p in players if p['Unique ID'] in squad_ids]
-    squad_df = pd.DataFrame(squad_players)
 
     # --- 2. DEDICATED UPLOAD SECTION (MODIFIED) ---
     with st.expander("⬆️ Upload New Player Data"):
@@ -78,6 +77,13 @@ def national_dashboard_page(df, players):
                     st.rerun()
                 # --- END OF MODIFIED LOGIC ---
 
+    # The squad's rows are sliced out of the (cached) role matrix that the
+    # call-ups below work on, instead of building a second frame from dicts.
+    full_matrix = get_player_role_matrix()
+    in_squad = full_matrix['Unique ID'].isin(squad_ids) if not full_matrix.empty else pd.Series(dtype=bool)
+    squad_df = (full_matrix.loc[in_squad, ["Unique ID", "Name", "AgeNum", "Average Rating", "Club", "Position"]]
+                .rename(columns={"AgeNum": "Age"}) if in_squad.any() else pd.DataFrame())
+
     if squad_df.empty:
         st.info("No players have been selected for the national squad yet. Go to 'National Squad Selection' to begin.")
         return
@@ -85,20 +91,21 @@ def national_dashboard_page(df, players):
     # --- 3. TACTIC SELECTION FOR ANALYSIS ---
     st.subheader("Squad Analysis")
     fav_tactic1, _ = get_national_favorite_tactics()
-    all_tactics = sorted(list(get_tactic_roles().keys()))
+    all_tactics = get_sorted_tactic_names()
     tactic_index = all_tactics.index(fav_tactic1) if fav_tactic1 in all_tactics else 0
     selected_tactic = st.selectbox("Analyze Squad based on Tactic:", options=all_tactics, index=tactic_index)
 
+    tactic_positions = get_tactic_roles()[selected_tactic]
+
     # --- 4. SQUAD CALCULATION ---
     analysis_results = None
     with st.spinner(f"Analyzing your squad's fit for the '{selected_tactic}' tactic..."):
-        master_ratings = get_master_role_ratings()
-        # apply_apt_weight=False: club playing time must not skew national selection.
-        analysis_results = calculate_squad_and_surplus(squad_players, get_tactic_roles()[selected_tactic], master_ratings, apply_apt_weight=False)
+        # Same cached analysis as National Best XI (club playing time does not count)
+        squad_key = tuple(sorted(squad_df['Unique ID']))
+        analysis_results = get_cached_national_squad_analysis(selected_tactic, squad_key)
 
     # --- 5. DISPLAY KPIS (Key Performance Indicators) ---
     st.markdown("---")
-    squad_df['Age'] = pd.to_numeric(squad_df['Age'], errors='coerce')
     avg_age = squad_df['Age'].mean()
 
     col1, col2, col3, col4 = st.columns(4)
@@ -110,37 +117,12 @@ def national_dashboard_page(df, players):
     strength_col, table_col = st.columns([2, 3])
 
     with strength_col:
-        positional_strengths = {}
-        tactic_positions = get_tactic_roles()[selected_tactic]
-        xi_squad = analysis_results["starting_xi"]
-        b_team_squad = analysis_results["b_team"]
-        depth_options = analysis_results["best_depth_options"]
-
-        for pos_key, role in tactic_positions.items():
-            ratings = []
-            def add_rating(player_obj):
-                if player_obj and player_obj.get('name') != '-':
-                    try: ratings.append(int(player_obj['rating'].rstrip('%')))
-                    except (ValueError, TypeError): pass
-            add_rating(xi_squad.get(pos_key))
-            add_rating(b_team_squad.get(pos_key))
-            # The player objects in depth_options are slightly different, need to access rating key
-            for player in depth_options.get(role, []):
-                if player and player.get('name') != '-':
-                    try: ratings.append(int(player['rating'].rstrip('%')))
-                    except (ValueError, TypeError): pass
-
-            # --- THIS IS THE FIX ---
-            # We now calculate and include 'min' and 'max'
-            if ratings:
-                positional_strengths[pos_key] = {
-                    'avg': sum(ratings) / len(ratings), 
-                    'min': min(ratings), 
-                    'max': max(ratings)
-                }
-            else:
-                positional_strengths[pos_key] = {'avg': 0, 'min': 0, 'max': 0}
-            # --- END OF FIX ---
+        positional_strengths = calculate_positional_strengths(
+            tactic_positions,
+            analysis_results["starting_xi"],
+            analysis_results["b_team"],
+            analysis_results["best_depth_options"],
+        )
         
         # This also needs the current_mode for theme-awareness
         current_theme_mode = get_theme_settings().get('current_mode', 'night')
@@ -148,9 +130,7 @@ def national_dashboard_page(df, players):
 
     with table_col:
         st.subheader("Current National Squad")
-        nat_cols = ["Name", "Age", "Club", "Position"]
-        if 'Average Rating' in squad_df.columns:
-            nat_cols.insert(2, "Average Rating")
+        nat_cols = ["Name", "Age", "Average Rating", "Club", "Position"]
         display_player_table(squad_df, columns=nat_cols)
 
     # --- 7. POTENTIAL CALL-UPS (Player Suggestions) ---
@@ -158,50 +138,38 @@ def national_dashboard_page(df, players):
     st.subheader("🎯 Potential Call-Ups")
     st.info("Discover potential upgrades from the eligible player pool who are not currently in your squad.")
 
-    full_matrix = get_player_role_matrix()
-    if full_matrix.empty:
-        st.warning("No player matrix data available.")
-        return
-
     # Filter for all players eligible for the nation
-    full_matrix['AgeNum'] = pd.to_numeric(full_matrix['Age'], errors='coerce')
-    eligible_pool = full_matrix[
-        (full_matrix['Nationality'] == nat_code) | (full_matrix['Second Nationality'] == nat_code)
-    ]
-    if int(nat_age) < 99:
-        eligible_pool = eligible_pool[eligible_pool['AgeNum'] <= int(nat_age)]
+    eligible_pool = full_matrix[full_matrix['Unique ID'].isin(get_eligible_national_ids(nat_code, int(nat_age)))]
     
-    # Split between players in the squad and those available for call-up
-    squad_matrix = full_matrix[full_matrix['Unique ID'].isin(squad_ids)].copy()
-    available_matrix = eligible_pool[~eligible_pool['Unique ID'].isin(squad_ids)].copy()
+    # Players available for call-up (everyone eligible outside the squad)
+    available_matrix = eligible_pool[~eligible_pool['Unique ID'].isin(squad_ids)]
 
     # UI Filter (Age only)
     max_age = st.slider("Maximum Age for Suggestions", 15, int(nat_age), int(nat_age))
     filtered_available = available_matrix[available_matrix['AgeNum'] <= max_age]
 
     # Core Logic: Find Upgrades
-    roles_tactic = sorted(list(set(get_tactic_roles()[selected_tactic].values())))
-    suggestions = []
-
-    for role in roles_tactic:
-        if role not in squad_matrix.columns or role not in filtered_available.columns:
-            continue
-
-        squad_best_rating = squad_matrix[role].max()
-        if pd.isna(squad_best_rating): squad_best_rating = 0 
+    # Per role, the best available player beats the squad's best for that
+    # role; every role is compared in one pass over the role columns.
+    roles_tactic = sorted(set(tactic_positions.values()) & set(full_matrix.columns))
+    squad_best = get_squad_role_best(squad_key).reindex(roles_tactic, fill_value=0)
+    available_roles = filtered_available[roles_tactic]
+    available_best = available_roles.max()
+    upgrade_roles = available_best.index[available_best > squad_best]
 
-        potential_upgrades = filtered_available[filtered_available[role] > squad_best_rating]
-        
-        if not potential_upgrades.empty:
-            best_upgrade = potential_upgrades.loc[potential_upgrades[role].idxmax()]
+    suggestions = []
+    if len(upgrade_roles):
+        best_idx = available_roles[upgrade_roles].idxmax()
+        best_rows = filtered_available.loc[best_idx.to_numpy(), ['Name', 'Age', 'Club', 'Position']]
+        for role, (name, age, club, position) in zip(upgrade_roles, best_rows.itertuples(index=False)):
             suggestions.append({
                 "role": role,
-                "player": best_upgrade['Name'],
-                "rating": best_upgrade[role],
-                "age": best_upgrade['Age'],
-                "club": best_upgrade['Club'],
-                "position": best_upgrade['Position'],
-                "squad_best": squad_best_rating
+                "player": name,
+                "rating": available_best[role],
+                "age": age,
+                "club": club,
+                "position": position,
+                "squad_best": squad_best[role]
             })
 
     # Display Suggestions
@@ -1,14 +1,13 @@
 # page_views/national_squad_matrix.py
 
 import streamlit as st
-import pandas as pd
 from io import StringIO
 import math
 
 from sqlite_db import get_national_team_settings, get_national_squad_ids, get_national_favorite_tactics
-from constants import get_valid_roles, get_tactic_roles
-from data_parser import get_player_role_matrix
-from utils import get_last_name, get_natural_role_sorter, color_dwrs_by_value, format_role_display, color_personality
+from constants import get_sorted_tactic_names
+from data_parser import get_player_role_matrix, get_eligible_national_ids
+from utils import get_natural_sorted_roles, dwrs_column_styles, format_role_display, color_personality
 from ui_components import display_custom_header, personality_filter_controls, filter_df_by_personality
 
 def national_squad_matrix_page(players):
@@ -28,7 +27,7 @@ def national_squad_matrix_page(players):
     col1, col2, col3 = st.columns(3)
     with col1:
         fav_tactic1, _ = get_national_favorite_tactics()
-        all_tactics = ["All Roles"] + sorted(list(get_tactic_roles().keys()))
+        all_tactics = ["All Roles"] + get_sorted_tactic_names()
         tactic_index = all_tactics.index(fav_tactic1) if fav_tactic1 in all_tactics else 0
         selected_tactic = st.selectbox("Select Tactic to Filter Roles", options=all_tactics, index=tactic_index)
     with col2:
@@ -38,9 +37,7 @@ def national_squad_matrix_page(players):
 
     # --- 3. DATA PREPARATION ---
     # Determine which role columns to show based on tactic selection
-    role_sorter = get_natural_role_sorter()
-    base_roles = get_valid_roles() if selected_tactic == "All Roles" else list(set(get_tactic_roles()[selected_tactic].values()))
-    selected_roles = sorted(base_roles, key=lambda r: role_sorter.get(r, (99, 99)))
+    selected_roles = get_natural_sorted_roles(selected_tactic)
     
     # Get the complete player matrix data
     full_matrix = get_player_role_matrix()
@@ -49,7 +46,7 @@ def national_squad_matrix_page(players):
         return
 
     if hide_retired:
-        full_matrix = full_matrix[full_matrix['Club'].str.lower() != 'retired']
+        full_matrix = full_matrix[~full_matrix['IsRetired']]
 
     # Filter the full matrix to find all players eligible for the national team
     try:
@@ -57,12 +54,7 @@ def national_squad_matrix_page(players):
     except (TypeError, ValueError):
         st.error("The configured age limit is not a valid number. Please check your national team settings.")
         return
-    full_matrix['AgeNum'] = pd.to_numeric(full_matrix['Age'], errors='coerce')
-    eligible_df = full_matrix[
-        (full_matrix['Nationality'] == nat_code) | (full_matrix['Second Nationality'] == nat_code)
-    ]
-    if nat_age < 99:
-        eligible_df = eligible_df[eligible_df['AgeNum'] <= nat_age]
+    eligible_df = full_matrix[full_matrix['Unique ID'].isin(get_eligible_national_ids(nat_code, nat_age))]
 
     # Split the eligible players into two groups: those in the squad and those who are not
     squad_player_ids = get_national_squad_ids()
@@ -71,9 +63,6 @@ def national_squad_matrix_page(players):
     allowed_personalities = personality_filter_controls(eligible_df, key_prefix="nat_matrix")
     eligible_df = filter_df_by_personality(eligible_df, allowed_personalities)
 
-    squad_df = eligible_df[eligible_df['Unique ID'].isin(squad_player_ids)].copy()
-    available_pool_df = eligible_df[~eligible_df['Unique ID'].isin(squad_player_ids)].copy()
-
     # --- 4. DISPLAY LOGIC ---
     # Define base columns (no financial data)
     base_cols = ["Name", "Age", "Position", "Personality", "Club"]
@@ -82,26 +71,22 @@ def national_squad_matrix_page(players):
     
     display_cols = base_cols + selected_roles
 
+    # Project to the shown columns (plus sort/filter keys) before any
+    # sorting, filtering and styling, rather than carrying every role column.
+    in_squad = eligible_df['Unique ID'].isin(squad_player_ids)
+    squad_df = eligible_df.loc[in_squad, display_cols + ['LastName']]
+    available_pool_df = eligible_df.loc[~in_squad, display_cols + ['LastName', 'AgeNum']]
+
     # --- Display the Current National Squad Table ---
     st.subheader(f"Current National Squad ({len(squad_df)} Players)")
     if squad_df.empty:
         st.info("No players have been selected for the squad yet. Go to 'National Squad Selection' to add players.")
     else:
-        squad_df['LastName'] = squad_df['Name'].apply(get_last_name)
-        squad_df = squad_df.sort_values(by=['LastName', 'Name']).drop(columns=['LastName'])
+        squad_df = squad_df.sort_values(by=['LastName', 'Name'])
         
-        # --- THIS IS THE FIX: Use the smart styler logic ---
+        # Style only the rated cells, one vectorized pass per role column
         styler = squad_df[display_cols].style.format("{:.0f}", subset=selected_roles, na_rep="-")
-        
-        def smart_full_styler(column):
-            styles = [''] * len(column)
-            valid_indices = column.dropna().index
-            for index in valid_indices:
-                styles[column.index.get_loc(index)] = color_dwrs_by_value(column[index])
-            return styles
-
-        styler = styler.apply(smart_full_styler, subset=selected_roles)
-        # --- END OF FIX ---
+        styler = styler.apply(dwrs_column_styles, subset=selected_roles)
 
         if 'Personality' in display_cols:
             styler = styler.format(subset=['Personality'], na_rep="-")
@@ -121,10 +106,8 @@ def national_squad_matrix_page(players):
             sort_c1, sort_c2 = st.columns([2, 1])
             with sort_c1:
                 sort_options = ["Name"] + selected_roles
-                sort_by = st.selectbox(
-                    "Sort by", options=sort_options,
-                    format_func=lambda x: "Name" if x == "Name" else format_role_display(x)
-                )
+                sort_labels = {"Name": "Name", **{role: format_role_display(role) for role in selected_roles}}
+                sort_by = st.selectbox("Sort by", options=sort_options, format_func=sort_labels.__getitem__)
             with sort_c2:
                 sort_direction = st.radio("Direction", ["Descending", "Ascending"], horizontal=True, index=0)
 
@@ -135,7 +118,7 @@ def national_squad_matrix_page(players):
                 max_age_filter = st.slider("Filter by Max Age", 15, nat_age, nat_age)
 
         # Apply filtering
-        filtered_df = available_pool_df[available_pool_df['AgeNum'] <= max_age_filter].copy()
+        filtered_df = available_pool_df[available_pool_df['AgeNum'] <= max_age_filter]
         
         if sort_by != "Name":
             filtered_df = filtered_df[
@@ -150,8 +133,7 @@ def national_squad_matrix_page(players):
         # Apply sorting
         is_ascending = (sort_direction == "Ascending")
         if sort_by == "Name":
-            filtered_df['LastName'] = filtered_df['Name'].apply(get_last_name)
-            sorted_df = filtered_df.sort_values(by='LastName', ascending=is_ascending).drop(columns=['LastName'])
+            sorted_df = filtered_df.sort_values(by='LastName', ascending=is_ascending)
         else:
             sorted_df = filtered_df.sort_values(by=sort_by, ascending=is_ascending, na_position='last')
         
@@ -180,15 +162,7 @@ def national_squad_matrix_page(players):
 
         # Style and display the paginated dataframe
         styler_pool = df_paginated[display_cols].style.format("{:.0f}", subset=selected_roles, na_rep="-")
-        
-        def smart_full_styler(column):
-            styles = [''] * len(column)
-            valid_indices = column.dropna().index
-            for index in valid_indices:
-                styles[column.index.get_loc(index)] = color_dwrs_by_value(column[index])
-            return styles
-            
-        styler_pool = styler_pool.apply(smart_full_styler, subset=selected_roles)
+        styler_pool = styler_pool.apply(dwrs_column_styles, subset=selected_roles)
         if 'Personality' in display_cols:
             styler_pool = styler_pool.format(subset=['Personality'], na_rep="-")
             styler_pool = styler_pool.map(color_personality, subset=['Personality'])
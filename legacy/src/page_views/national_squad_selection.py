@@ -5,7 +5,70 @@ import pandas as pd
 from ui_components import display_custom_header
 from sqlite_db import (get_national_team_settings, get_national_squad_ids, 
                        set_national_squad_ids)
-from utils import get_last_name
+from data_parser import get_eligible_national_ids
+
+def _apply_squad_edits(key, row_ids):
+    """
+    on_change for the In Squad editor: folds its checkbox edits into the
+    session selection. The editor's key is then bumped so the next table,
+    re-sorted by the new selection, starts without stale row edits.
+    """
+    selection = set(st.session_state.national_squad_selection)
+    for row, change in st.session_state[key]["edited_rows"].items():
+        if 'In Squad' in change:
+            uid = row_ids[int(row)]
+            if change['In Squad']:
+                selection.add(uid)
+            else:
+                selection.discard(uid)
+    st.session_state.national_squad_selection = selection
+    st.session_state.squad_editor_version = st.session_state.get('squad_editor_version', 0) + 1
+
+@st.fragment
+def _squad_editor(df, eligible):
+    """
+    Search box, squad count and the In Squad table. A fragment, so a toggle
+    or search only reruns this part and not the whole page (player load and
+    eligibility filter).
+    """
+    selection = st.session_state.national_squad_selection
+
+    st.subheader(f"Current Squad ({len(selection)} Players)")
+    search_term = st.text_input("Search players by name...", key="search_available")
+
+    # The eligible pool plus every selected player, taken from the FULL
+    # player list: a squad member who aged out (or whose nationality data
+    # changed) must still be listed so the user can remove him — otherwise
+    # the header count and the list silently disagree.
+    in_squad = df['Unique ID'].isin(selection)
+    pool_df = df[eligible | in_squad]
+    if search_term:
+        pool_df = pool_df[pool_df['Name'].str.contains(search_term, case=False, na=False)]
+
+    # One editable table with an "In Squad" checkbox instead of a button
+    # (and a rerun of every row's widgets) per player. Selected players first.
+    edit_df = (pool_df[['Unique ID', 'Name', 'Age', 'Club', 'Position']]
+               .assign(**{'In Squad': in_squad[pool_df.index]})
+               .sort_values(by=['In Squad', 'Name'], ascending=[False, True]))
+
+    if edit_df.empty:
+        st.info("No players match your search.")
+    else:
+        editor_key = f"squad_editor_{st.session_state.get('squad_editor_version', 0)}"
+        st.data_editor(
+            edit_df,
+            key=editor_key,
+            on_change=_apply_squad_edits,
+            args=(editor_key, tuple(edit_df['Unique ID'])),
+            column_config={
+                "Unique ID": None,
+                "Age": st.column_config.NumberColumn(format="%d"),
+                "In Squad": st.column_config.CheckboxColumn(),
+            },
+            disabled=['Name', 'Age', 'Club', 'Position'],
+            column_order=['In Squad', 'Name', 'Age', 'Club', 'Position'],
+            hide_index=True, use_container_width=True, height=500,
+        )
 
 def national_squad_selection_page(players):
     """
@@ -31,16 +94,11 @@ def national_squad_selection_page(players):
     nat_age = int(nat_age)
     df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
 
-    # Filter for players who have the correct primary or secondary nationality
-    eligible_df = df[
-        (df['Nationality'] == nat_code) | (df['Second Nationality'] == nat_code)
-    ].copy()
-    
-    # If it's a youth team (age limit is not 99), also filter by age
-    if nat_age < 99:
-        eligible_df = eligible_df[eligible_df['Age'] <= nat_age]
+    # Players with the correct primary or secondary nationality (and, for
+    # youth teams, within the age limit)
+    eligible = df['Unique ID'].isin(get_eligible_national_ids(nat_code, nat_age))
 
-    if eligible_df.empty:
+    if not eligible.any():
         st.error(f"No players found with nationality '{nat_code}' matching the age criteria (<= {nat_age}).")
         return
 
@@ -51,68 +109,7 @@ def national_squad_selection_page(players):
     # Initialize the session state to hold the user's selections during their session
     if 'national_squad_selection' not in st.session_state:
         st.session_state.national_squad_selection = set(current_squad_ids)
-    
-    # Define the two main columns for the layout
-    col1, col2 = st.columns(2)
-
-    # --- COLUMN 1: AVAILABLE PLAYER POOL ---
-    with col1:
-        st.subheader("Available Player Pool")
-        search_term = st.text_input("Search available players by name...", key="search_available")
-
-        # Further filter the pool to show players who are NOT yet selected
-        available_players_df = eligible_df[~eligible_df['Unique ID'].isin(st.session_state.national_squad_selection)]
-        if search_term:
-            available_players_df = available_players_df[available_players_df['Name'].str.contains(search_term, case=False, na=False)]
-
-        # Display players in a scrollable container
-        with st.container(height=500):
-            if available_players_df.empty:
-                st.info("No available players match your search.")
-            else:
-                for _, player in available_players_df.sort_values(by="Name").iterrows():
-                    row = st.columns([0.8, 0.2])
-                    with row[0]:
-                        try:
-                            age_display = int(player['Age'])
-                        except (ValueError, TypeError):
-                            age_display = "N/A"
-                        st.markdown(f"**{player['Name']}** ({age_display})")
-                        st.caption(f"{player['Club']} | {player['Position']}")
-                    with row[1]:
-                        if st.button("Add", key=f"add_{player['Unique ID']}", use_container_width=True):
-                            st.session_state.national_squad_selection.add(player['Unique ID'])
-                            st.rerun() # Rerun to update the lists instantly
-                    st.divider()
-
-    # --- COLUMN 2: CURRENTLY SELECTED SQUAD ---
-    with col2:
-        st.subheader(f"Current Squad ({len(st.session_state.national_squad_selection)} Players)")
-
-        # Use the FULL player list here, not eligible_df: a squad member who
-        # aged out (or whose nationality data changed) must still be visible so
-        # the user can remove him — otherwise the header count and the list
-        # silently disagree.
-        squad_df = df[df['Unique ID'].isin(st.session_state.national_squad_selection)]
-
-        with st.container(height=500):
-            if squad_df.empty:
-                st.info("No players have been added to the squad yet.")
-            else:
-                for _, player in squad_df.sort_values(by="Name").iterrows():
-                    row = st.columns([0.8, 0.2])
-                    with row[0]:
-                        try:
-                            age_display = int(player['Age'])
-                        except (ValueError, TypeError):
-                            age_display = "N/A"
-                        st.markdown(f"**{player['Name']}** ({age_display})")
-                        st.caption(f"{player['Club']} | {player['Position']}")
-                    with row[1]:
-                        if st.button("Remove", key=f"remove_{player['Unique ID']}", use_container_width=True):
-                            st.session_state.national_squad_selection.remove(player['Unique ID'])
-                            st.rerun() # Rerun to update the lists instantly
-                    st.divider()
+    _squad_editor(df, eligible)
 
     st.divider()
 
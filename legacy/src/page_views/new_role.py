@@ -1,5 +1,6 @@
 # new_role.py
 import streamlit as st
+import pandas as pd
 
 from definitions_handler import get_definitions, save_definitions
 from ui_components import clear_all_caches
@@ -45,28 +46,24 @@ def create_new_role_page():
         st.subheader("3. Key and Preferable Attributes")
         st.warning("A 'Key' attribute gets the highest multiplier. A 'Preferable' attribute gets a medium multiplier. If both are checked, 'Key' will be prioritized.")
 
-        tc, mc, pc = st.columns(3)
-        with tc:
-            st.markdown("#### Technical")
-            for attr in TECHNICAL_ATTRS:
-                cols = st.columns([0.6, 0.2, 0.2])
-                cols[0].write(attr)
-                cols[1].checkbox("K", key=f"key_{attr}")
-                cols[2].checkbox("P", key=f"pref_{attr}")
-        with mc:
-            st.markdown("#### Mental")
-            for attr in MENTAL_ATTRS:
-                cols = st.columns([0.6, 0.2, 0.2])
-                cols[0].write(attr)
-                cols[1].checkbox("K", key=f"key_{attr}")
-                cols[2].checkbox("P", key=f"pref_{attr}")
-        with pc:
-            st.markdown("#### Physical")
-            for attr in PHYSICAL_ATTRS:
-                cols = st.columns([0.6, 0.2, 0.2])
-                cols[0].write(attr)
-                cols[1].checkbox("K", key=f"key_{attr}")
-                cols[2].checkbox("P", key=f"pref_{attr}")
+        # One editable table for all attributes instead of two checkbox
+        # widgets per attribute, which were rebuilt on every keystroke above.
+        attrs_df = pd.DataFrame({
+            'Attribute': ALL_ATTRIBUTES,
+            'Category': ['Technical'] * len(TECHNICAL_ATTRS) + ['Mental'] * len(MENTAL_ATTRS) + ['Physical'] * len(PHYSICAL_ATTRS),
+            'Key': False,
+            'Preferable': False,
+        })
+        edited_attrs = st.data_editor(
+            attrs_df,
+            column_config={
+                'Key': st.column_config.CheckboxColumn("Key"),
+                'Preferable': st.column_config.CheckboxColumn("Preferable"),
+            },
+            disabled=['Attribute', 'Category'],
+            hide_index=True, use_container_width=True, height=400,
+            key="new_role_attrs",
+        )
         
         submitted = st.form_submit_button("Create New Role", type="primary")
 
@@ -80,12 +77,9 @@ def create_new_role_page():
                 st.error(f"Validation Failed: The short name '{final_short_name}' already exists. Please choose a different role name or duty.")
                 return
 
-            key_attrs, pref_attrs = [], []
-            for attr in ALL_ATTRIBUTES:
-                if st.session_state.get(f"key_{attr}"):
-                    key_attrs.append(attr)
-                elif st.session_state.get(f"pref_{attr}"):
-                    pref_attrs.append(attr)
+            is_key = edited_attrs['Key'].astype(bool)
+            key_attrs = edited_attrs.loc[is_key, 'Attribute'].tolist()
+            pref_attrs = edited_attrs.loc[~is_key & edited_attrs['Preferable'].astype(bool), 'Attribute'].tolist()
 
             full_role_display_name = f"{role_name} ({role_duty})"
             
@@ -102,7 +96,7 @@ def create_new_role_page():
                 st.success(f"Role '{full_role_display_name}' created successfully! Reloading application...")
                 
                 # --- FIX: Clear all session state keys to reset the form completely ---
-                keys_to_delete = [k for k in st.session_state.keys() if k.startswith('new_role_') or k.startswith('key_') or k.startswith('pref_')]
+                keys_to_delete = [k for k in st.session_state.keys() if k.startswith('new_role_')]
                 for key in keys_to_delete:
                     del st.session_state[key]
                 
@@ -7,6 +7,25 @@ from utils import format_role_display, get_role_display_map
 from constants import MASTER_POSITION_MAP, get_position_to_role_mapping
 from ui_components import clear_all_caches
 
+# Green pitch background for the formation rows. Still emitted on every run:
+# Streamlit drops elements a rerun does not render again.
+_PITCH_CSS = """
+<style>
+div[data-testid="stVerticalBlock"] > div[style*="flex-direction: column;"] > div[data-testid="stHorizontalBlock"] {
+    background-color: #2a5d34;
+    border: 1px solid #ccc;
+    border-radius: 10px;
+    padding: 15px 10px;
+}
+</style>
+"""
+
+# Goalkeeper dropdown options, filtered out of the role map once per
+# definitions version; clear_all_caches() drops this with the cache_data store.
+@st.cache_data
+def _gk_role_options():
+    return tuple(role for role in get_role_display_map() if "GK" in role or "SK" in role)
+
 def create_new_tactic_page():
     st.title("Create a New Tactical Formation")
     st.info("Design your formation on the pitch below. Use the dropdowns to select a role for each active position. You must select exactly one Goalkeeper and ten outfield players.")
@@ -16,6 +35,19 @@ def create_new_tactic_page():
     pos_to_role_map = get_position_to_role_mapping()
     role_display_map = get_role_display_map()
 
+    # Each position group's dropdown options, built once rather than once per
+    # selectbox that shares them. A position's roles already come sorted by
+    # display name; only merged groups need sorting again.
+    def _sorted_options(*positions):
+        roles = [role for pos in positions for role in pos_to_role_map.get(pos, ())]
+        if len(positions) > 1:
+            roles.sort(key=lambda r: role_display_map.get(r, r))
+        return ["- Unused -"] + roles
+    role_options = {pos: _sorted_options(pos) for pos in
+                    ("ST (C)", "AM (L)", "AM (C)", "AM (R)", "M (L)", "M (C)", "M (R)", "DM", "D (L)", "D (C)", "D (R)")}
+    role_options["DM/WB (L)"] = _sorted_options("DM", "WB (L)")
+    role_options["DM/WB (R)"] = _sorted_options("DM", "WB (R)")
+
     with st.form("new_tactic_form"):
         # --- Tactic Naming ---
         st.subheader("1. Tactic Name")
@@ -33,67 +65,57 @@ def create_new_tactic_page():
 
         # --- VISUAL PITCH LAYOUT USING STREAMLIT COLUMNS ---
         with st.container():
-            st.markdown("""
-                <style>
-                div[data-testid="stVerticalBlock"] > div[style*="flex-direction: column;"] > div[data-testid="stHorizontalBlock"] {
-                    background-color: #2a5d34;
-                    border: 1px solid #ccc;
-                    border-radius: 10px;
-                    padding: 15px 10px;
-                }
-                </style>
-            """, unsafe_allow_html=True)
+            st.markdown(_PITCH_CSS, unsafe_allow_html=True)
 
             # --- Strikers (3 positions, centered) ---
             st.markdown("<p style='text-align: center; color: #ccc;'>Strikers</p>", unsafe_allow_html=True)
             s_cols = st.columns(5)
             with s_cols[1]:
-                selections = {'STL': st.selectbox("STL", ["- Unused -"] + sorted(pos_to_role_map.get("ST (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_STL", format_func=format_role_display)}
+                selections = {'STL': st.selectbox("STL", role_options["ST (C)"], key="role_STL", format_func=format_role_display)}
             with s_cols[2]:
-                selections['STC'] = st.selectbox("STC", ["- Unused -"] + sorted(pos_to_role_map.get("ST (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_STC", format_func=format_role_display)
+                selections['STC'] = st.selectbox("STC", role_options["ST (C)"], key="role_STC", format_func=format_role_display)
             with s_cols[3]:
-                selections['STR'] = st.selectbox("STR", ["- Unused -"] + sorted(pos_to_role_map.get("ST (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_STR", format_func=format_role_display)
+                selections['STR'] = st.selectbox("STR", role_options["ST (C)"], key="role_STR", format_func=format_role_display)
 
             # --- Attacking Midfield (5 positions) ---
             st.markdown("<p style='text-align: center; color: #ccc;'>Attacking Midfield</p>", unsafe_allow_html=True)
             am_cols = st.columns(5)
-            selections['AML'] = am_cols[0].selectbox("AML", ["- Unused -"] + sorted(pos_to_role_map.get("AM (L)", []), key=lambda r: role_display_map.get(r, r)), key="role_AML", format_func=format_role_display)
-            selections['AMCL'] = am_cols[1].selectbox("AMCL", ["- Unused -"] + sorted(pos_to_role_map.get("AM (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_AMCL", format_func=format_role_display)
-            selections['AMC'] = am_cols[2].selectbox("AMC", ["- Unused -"] + sorted(pos_to_role_map.get("AM (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_AMC", format_func=format_role_display)
-            selections['AMCR'] = am_cols[3].selectbox("AMCR", ["- Unused -"] + sorted(pos_to_role_map.get("AM (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_AMCR", format_func=format_role_display)
-            selections['AMR'] = am_cols[4].selectbox("AMR", ["- Unused -"] + sorted(pos_to_role_map.get("AM (R)", []), key=lambda r: role_display_map.get(r, r)), key="role_AMR", format_func=format_role_display)
+            selections['AML'] = am_cols[0].selectbox("AML", role_options["AM (L)"], key="role_AML", format_func=format_role_display)
+            selections['AMCL'] = am_cols[1].selectbox("AMCL", role_options["AM (C)"], key="role_AMCL", format_func=format_role_display)
+            selections['AMC'] = am_cols[2].selectbox("AMC", role_options["AM (C)"], key="role_AMC", format_func=format_role_display)
+            selections['AMCR'] = am_cols[3].selectbox("AMCR", role_options["AM (C)"], key="role_AMCR", format_func=format_role_display)
+            selections['AMR'] = am_cols[4].selectbox("AMR", role_options["AM (R)"], key="role_AMR", format_func=format_role_display)
 
             # --- Midfield (5 positions) ---
             st.markdown("<p style='text-align: center; color: #ccc;'>Midfield</p>", unsafe_allow_html=True)
             m_cols = st.columns(5)
-            selections['ML'] = m_cols[0].selectbox("ML", ["- Unused -"] + sorted(pos_to_role_map.get("M (L)", []), key=lambda r: role_display_map.get(r, r)), key="role_ML", format_func=format_role_display)
-            selections['MCL'] = m_cols[1].selectbox("MCL", ["- Unused -"] + sorted(pos_to_role_map.get("M (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_MCL", format_func=format_role_display)
-            selections['MC'] = m_cols[2].selectbox("MC", ["- Unused -"] + sorted(pos_to_role_map.get("M (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_MC", format_func=format_role_display)
-            selections['MCR'] = m_cols[3].selectbox("MCR", ["- Unused -"] + sorted(pos_to_role_map.get("M (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_MCR", format_func=format_role_display)
-            selections['MR'] = m_cols[4].selectbox("MR", ["- Unused -"] + sorted(pos_to_role_map.get("M (R)", []), key=lambda r: role_display_map.get(r, r)), key="role_MR", format_func=format_role_display)
+            selections['ML'] = m_cols[0].selectbox("ML", role_options["M (L)"], key="role_ML", format_func=format_role_display)
+            selections['MCL'] = m_cols[1].selectbox("MCL", role_options["M (C)"], key="role_MCL", format_func=format_role_display)
+            selections['MC'] = m_cols[2].selectbox("MC", role_options["M (C)"], key="role_MC", format_func=format_role_display)
+            selections['MCR'] = m_cols[3].selectbox("MCR", role_options["M (C)"], key="role_MCR", format_func=format_role_display)
+            selections['MR'] = m_cols[4].selectbox("MR", role_options["M (R)"], key="role_MR", format_func=format_role_display)
 
             # --- Defensive Midfield (5 positions) ---
             st.markdown("<p style='text-align: center; color: #ccc;'>Defensive Midfield</p>", unsafe_allow_html=True)
             dm_cols = st.columns(5)
-            selections['DML'] = dm_cols[0].selectbox("DML/WBL", ["- Unused -"] + sorted(pos_to_role_map.get("DM", []) + pos_to_role_map.get("WB (L)", []), key=lambda r: role_display_map.get(r, r)), key="role_DML", format_func=format_role_display)
-            selections['DMCL'] = dm_cols[1].selectbox("DMCL", ["- Unused -"] + sorted(pos_to_role_map.get("DM", []), key=lambda r: role_display_map.get(r, r)), key="role_DMCL", format_func=format_role_display)
-            selections['DMC'] = dm_cols[2].selectbox("DMC", ["- Unused -"] + sorted(pos_to_role_map.get("DM", []), key=lambda r: role_display_map.get(r, r)), key="role_DMC", format_func=format_role_display)
-            selections['DMCR'] = dm_cols[3].selectbox("DMCR", ["- Unused -"] + sorted(pos_to_role_map.get("DM", []), key=lambda r: role_display_map.get(r, r)), key="role_DMCR", format_func=format_role_display)
-            selections['DMR'] = dm_cols[4].selectbox("DMR/WBR", ["- Unused -"] + sorted(pos_to_role_map.get("DM", []) + pos_to_role_map.get("WB (R)", []), key=lambda r: role_display_map.get(r, r)), key="role_DMR", format_func=format_role_display)
+            selections['DML'] = dm_cols[0].selectbox("DML/WBL", role_options["DM/WB (L)"], key="role_DML", format_func=format_role_display)
+            selections['DMCL'] = dm_cols[1].selectbox("DMCL", role_options["DM"], key="role_DMCL", format_func=format_role_display)
+            selections['DMC'] = dm_cols[2].selectbox("DMC", role_options["DM"], key="role_DMC", format_func=format_role_display)
+            selections['DMCR'] = dm_cols[3].selectbox("DMCR", role_options["DM"], key="role_DMCR", format_func=format_role_display)
+            selections['DMR'] = dm_cols[4].selectbox("DMR/WBR", role_options["DM/WB (R)"], key="role_DMR", format_func=format_role_display)
 
             # --- Defense (5 positions) ---
             st.markdown("<p style='text-align: center; color: #ccc;'>Defense</p>", unsafe_allow_html=True)
             d_cols = st.columns(5)
-            selections['DL'] = d_cols[0].selectbox("DL", ["- Unused -"] + sorted(pos_to_role_map.get("D (L)", []), key=lambda r: role_display_map.get(r, r)), key="role_DL", format_func=format_role_display)
-            selections['DCL'] = d_cols[1].selectbox("DCL", ["- Unused -"] + sorted(pos_to_role_map.get("D (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_DCL", format_func=format_role_display)
-            selections['DC'] = d_cols[2].selectbox("DC", ["- Unused -"] + sorted(pos_to_role_map.get("D (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_DC", format_func=format_role_display)
-            selections['DCR'] = d_cols[3].selectbox("DCR", ["- Unused -"] + sorted(pos_to_role_map.get("D (C)", []), key=lambda r: role_display_map.get(r, r)), key="role_DCR", format_func=format_role_display)
-            selections['DR'] = d_cols[4].selectbox("DR", ["- Unused -"] + sorted(pos_to_role_map.get("D (R)", []), key=lambda r: role_display_map.get(r, r)), key="role_DR", format_func=format_role_display)
+            selections['DL'] = d_cols[0].selectbox("DL", role_options["D (L)"], key="role_DL", format_func=format_role_display)
+            selections['DCL'] = d_cols[1].selectbox("DCL", role_options["D (C)"], key="role_DCL", format_func=format_role_display)
+            selections['DC'] = d_cols[2].selectbox("DC", role_options["D (C)"], key="role_DC", format_func=format_role_display)
+            selections['DCR'] = d_cols[3].selectbox("DCR", role_options["D (C)"], key="role_DCR", format_func=format_role_display)
+            selections['DR'] = d_cols[4].selectbox("DR", role_options["D (R)"], key="role_DR", format_func=format_role_display)
 
             # --- Goalkeeper (Mandatory) ---
             st.markdown("<p style='text-align: center; color: #ccc;'>Goalkeeper</p>", unsafe_allow_html=True)
-            gk_roles = [role for role, name in get_role_display_map().items() if "GK" in role or "SK" in role]
-            selected_gk_role = st.selectbox("Goalkeeper Role", options=gk_roles, label_visibility="collapsed", format_func=format_role_display, key="role_GK")
+            selected_gk_role = st.selectbox("Goalkeeper Role", options=_gk_role_options(), label_visibility="collapsed", format_func=format_role_display, key="role_GK")
 
         st.divider()
         submitted = st.form_submit_button("Create New Tactic", type="primary")
@@ -111,9 +133,16 @@ def create_new_tactic_page():
                 st.error(f"Validation Failed: A tactic named '{final_tactic_name}' already exists. Please choose a different name.")
                 return
 
-            all_selections = {key.split('_')[1]: value for key, value in st.session_state.items() if key.startswith("role_")}
-            outfield_players = {pos: role for pos, role in all_selections.items() if role != "- Unused -" and pos != "GK"}
-            
+            # One pass over session_state collects the form's role widget keys
+            # (cleared after saving) and the outfield selections.
+            role_keys, outfield_players = [], {}
+            for key, role in st.session_state.items():
+                if key.startswith("role_"):
+                    role_keys.append(key)
+                    pos = key[5:]
+                    if pos != "GK" and role != "- Unused -":
+                        outfield_players[pos] = role
+
             if len(outfield_players) != 10:
                 st.error(f"Validation Failed: You must select exactly 10 outfield players. You have selected {len(outfield_players)}.")
                 return
@@ -128,8 +157,7 @@ def create_new_tactic_page():
                 if pos_key in ["ST", "STC"]: stratum = "Strikers"
 
                 if stratum:
-                    if stratum not in new_tactic_layout: new_tactic_layout[stratum] = []
-                    new_tactic_layout[stratum].append(pos_key)
+                    new_tactic_layout.setdefault(stratum, []).append(pos_key)
 
             # --- Saving ---
             definitions['tactic_roles'][final_tactic_name] = new_tactic_roles
@@ -142,13 +170,9 @@ def create_new_tactic_page():
                 # ------------------- START OF NEW CODE -------------------
                 # This block will clear all the form's widget states.
                 
-                # Find all keys associated with this form's widgets
-                keys_to_delete = [k for k in st.session_state.keys() if k.startswith("role_") or k in ["new_tactic_name", "new_tactic_shape"]]
-                
-                # Safely delete each key from the session state
-                for key in keys_to_delete:
-                    if key in st.session_state:
-                        del st.session_state[key]
+                # Safely delete each of the form's widget keys from the session state
+                for key in role_keys + ["new_tactic_name", "new_tactic_shape"]:
+                    st.session_state.pop(key, None)
                 # -------------------- END OF NEW CODE --------------------
 
                 clear_all_caches()
@@ -1,18 +1,26 @@
 # player_comparison.py
 
+from itertools import cycle, islice
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 
 from config_handler import get_theme_settings
-from sqlite_db import (get_user_club, get_favorite_tactics,
+from sqlite_db import (get_all_players, get_user_club, get_favorite_tactics,
                        get_national_squad_ids, get_national_favorite_tactics,
                        get_national_team_settings)
-from constants import (get_valid_roles, get_tactic_roles, GLOBAL_STAT_CATEGORIES,
-                       GK_STAT_CATEGORIES, get_role_specific_weights, get_gk_roles)
-from utils import (format_role_display, hex_to_rgb, color_attribute_by_value,
+from constants import (get_valid_roles, get_tactic_roles, get_sorted_tactic_names, GLOBAL_STAT_CATEGORIES,
+                       GK_STAT_CATEGORIES, GLOBAL_STAT_BY_CATEGORY, GK_STAT_BY_CATEGORY,
+                       get_role_specific_weights, get_gk_roles)
+from utils import (format_role_display, hex_to_rgba_fill, attribute_value_styles,
                    color_personality, is_national_mode_active)
-from ui_components import display_custom_header
+from ui_components import display_custom_header, register_player_data_cache
+from analytics import _parse_attr_column, _parse_attr_values
+
+# Every rated attribute name, for telling attribute rows/columns apart
+_ALL_ATTRS = frozenset(GLOBAL_STAT_CATEGORIES) | frozenset(GK_STAT_CATEGORIES)
 
 def player_comparison_page(players):
     #st.title("Player Comparison")
@@ -55,7 +63,7 @@ def player_comparison_page(players):
     with f_col1:
         # In National mode, prefer the national favorite tactics.
         fav_tactic1, _ = get_national_favorite_tactics() if national_mode else get_favorite_tactics()
-        all_tactics = ["All Roles"] + sorted(list(get_tactic_roles().keys()))
+        all_tactics = ["All Roles"] + get_sorted_tactic_names()
         tactic_index = all_tactics.index(fav_tactic1) if fav_tactic1 in all_tactics else 0
         selected_tactic = st.selectbox("Filter by Tactic", options=all_tactics, index=tactic_index)
 
@@ -73,19 +81,22 @@ def player_comparison_page(players):
         else:
             pool_filter = st.selectbox("Filter by Club", options=["My Club", "All Players"])
 
-    player_pool = df.copy()
+    # Filtering below always builds new frames, so the pool starts as df itself
+    player_pool = df
     if pool_filter == "My Club":
         player_pool = player_pool[player_pool['Club'] == user_club]
     elif pool_filter != "All Players":  # national squad option
         squad_ids = get_national_squad_ids()
         player_pool = player_pool[player_pool['Unique ID'].isin(squad_ids)]
     
-    player_pool = player_pool[player_pool['Assigned Roles'].apply(lambda roles: selected_role in roles if isinstance(roles, list) else False)]
+    # One row per (player, assigned role); a player stays if any of theirs matches
+    has_role = player_pool['Assigned Roles'].explode().eq(selected_role).groupby(level=0).any()
+    player_pool = player_pool[has_role]
 
     # Create a mapping from Unique ID to a descriptive, unique display name
     player_map = {
-        p['Unique ID']: f"{p['Name']} ({p['Club']})"
-        for _, p in player_pool.iterrows()
+        uid: f"{name} ({club})"
+        for uid, name, club in zip(player_pool['Unique ID'], player_pool['Name'], player_pool['Club'])
     }
     
     if not player_map:
@@ -101,10 +112,10 @@ def player_comparison_page(players):
     )
 
     if selected_ids:
-        # Filter the main DataFrame using the list of selected Unique IDs
-        comparison_df = df[df['Unique ID'].isin(selected_ids)].copy()
-        
-        
+        # Filter the main DataFrame using the list of selected Unique IDs. Only
+        # read from here on; the display table below takes its own copy.
+        comparison_df = df[df['Unique ID'].isin(selected_ids)]
+
         is_gk_role = selected_role in get_gk_roles()
 
         role_weights = get_role_specific_weights().get(selected_role, {"key": [], "preferable": []})
@@ -113,11 +124,11 @@ def player_comparison_page(players):
 
         if is_gk_role:
             gameplay_attrs = { 'Shot Stopping': ['Reflexes', 'One vs One', 'Handling', 'Agility'], 'Aerial Control': ['Aerial Reach', 'Command of Area', 'Jumping Reach'], 'Distribution': ['Kicking', 'Throwing', 'Passing', 'Vision'], 'Sweeping': ['Rushing Out (Tendency)', 'Acceleration', 'Pace'], 'Mental': ['Composure', 'Concentration', 'Decisions', 'Anticipation']}
-            meta_categories = { "Top Importance": [attr for attr, cat in GK_STAT_CATEGORIES.items() if cat == "Top Importance"], "High Importance": [attr for attr, cat in GK_STAT_CATEGORIES.items() if cat == "High Importance"], "Medium Importance": [attr for attr, cat in GK_STAT_CATEGORIES.items() if cat == "Medium Importance"], "Key": key_attrs, "Preferable": pref_attrs}
+            meta_categories = { "Top Importance": GK_STAT_BY_CATEGORY.get("Top Importance", ()), "High Importance": GK_STAT_BY_CATEGORY.get("High Importance", ()), "Medium Importance": GK_STAT_BY_CATEGORY.get("Medium Importance", ()), "Key": key_attrs, "Preferable": pref_attrs}
             meta_chart_title = "GK Meta-Attribute Profile"
         else:
             gameplay_attrs = { 'Pace': ['Acceleration', 'Pace'], 'Shooting': ['Finishing', 'Long Shots'], 'Passing': ['Passing', 'Crossing', 'Vision'], 'Dribbling': ['Dribbling', 'First Touch', 'Flair'], 'Defending': ['Tackling', 'Marking', 'Positioning'], 'Physical': ['Strength', 'Stamina', 'Balance'], 'Mental': ['Work Rate', 'Determination', 'Teamwork', 'Decisions']}
-            meta_categories = { "Extremely Important": [attr for attr, cat in GLOBAL_STAT_CATEGORIES.items() if cat == "Extremely Important"], "Important": [attr for attr, cat in GLOBAL_STAT_CATEGORIES.items() if cat == "Important"], "Good": [attr for attr, cat in GLOBAL_STAT_CATEGORIES.items() if cat == "Good"], "Key": key_attrs, "Preferable": pref_attrs}
+            meta_categories = { "Extremely Important": GLOBAL_STAT_BY_CATEGORY.get("Extremely Important", ()), "Important": GLOBAL_STAT_BY_CATEGORY.get("Important", ()), "Good": GLOBAL_STAT_BY_CATEGORY.get("Good", ()), "Key": key_attrs, "Preferable": pref_attrs}
             meta_chart_title = "Outfield Meta-Attribute Profile"
 
         with st.expander("What do these charts show?"):
@@ -132,135 +143,116 @@ def player_comparison_page(players):
                 meta_string = "".join([f"- **{cat}**: `{', '.join(attrs) or 'None'}`\n" for cat, attrs in meta_categories.items()])
                 st.markdown(meta_string)
         
-        def parse_attribute_value(raw_value):
-            if isinstance(raw_value, str) and '-' in raw_value:
-                try: return sum(map(float, raw_value.split('-'))) / 2
-                except (ValueError, TypeError): return 0.0
-            else:
-                try: return float(raw_value)
-                except (ValueError, TypeError): return 0.0
+        # Chart attributes of the selected players parsed column by column in one
+        # vectorized pass, one row per player in selection order; ranges become
+        # their mean and absent or unparsable values count as 0.
+        chart_attrs = list(dict.fromkeys(attr for categories in (gameplay_attrs, meta_categories)
+                                         for attrs in categories.values() for attr in attrs))
+        attr_index = {attr: i for i, attr in enumerate(chart_attrs)}
+        selected_df = comparison_df.drop_duplicates('Unique ID').set_index('Unique ID').reindex(selected_ids)
+        no_values = np.zeros(len(selected_df))
+        attr_values = np.column_stack([_parse_attr_column(selected_df[attr]) if attr in selected_df.columns else no_values
+                                       for attr in chart_attrs])
+
+        def category_averages(categories):
+            """Players x categories matrix of attribute averages (0 for an empty
+            category), as one product with a matrix of 1/len(attrs) weights."""
+            weights = np.zeros((len(chart_attrs), len(categories)))
+            for j, attrs in enumerate(categories.values()):
+                for attr in attrs:
+                    weights[attr_index[attr], j] += 1 / len(attrs)
+            return attr_values @ weights
+
+        # Per-player trace styling and the shared radar layout, built once for both charts.
+        # Colors come from the palette, looping if necessary.
+        trace_colors = list(islice(cycle(trace_palette), len(selected_ids)))
+        trace_fills = [hex_to_rgba_fill(color, 0.2) for color in trace_colors]
+        trace_names = [player_map[uid] for uid in selected_ids]
+        polar_layout = dict(
+            polar=dict(
+                radialaxis=dict(visible=True, range=[0, 20], tickfont=dict(color=font_color), gridcolor=grid_color),
+                angularaxis=dict(tickfont=dict(size=12, color=font_color), direction="clockwise"),
+                bgcolor=chart_bg_color
+            ),
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            margin=dict(l=40, r=40, t=40, b=40)
+        )
+
+        def radar_figure(categories):
+            fig = go.Figure()
+            values = category_averages(categories)
+            # Append the first label and value to the end to CLOSE the shape
+            theta = list(categories.keys())
+            theta.append(theta[0])
+            for row, name, color, fill in zip(values.tolist(), trace_names, trace_colors, trace_fills):
+                fig.add_trace(go.Scatterpolar(
+                    r=row + row[:1],
+                    theta=theta,
+                    fill='toself',
+                    name=name,
+                    line=dict(color=color),
+                    fillcolor=fill
+                ))
+            return fig
 
         chart_col1, chart_col2 = st.columns(2)
         with chart_col1:
             st.subheader("Gameplay Areas")
-            fig1 = go.Figure()
-
-            # --- FIX: Define the theta values for the loop ONCE ---
-            gameplay_theta = list(gameplay_attrs.keys())
-
-            # --- UPDATED: Loop to build chart with dynamic colors ---
-            for i, uid in enumerate(selected_ids):
-                player_data = comparison_df[comparison_df['Unique ID'] == uid].iloc[0]
-                category_values = [sum(parse_attribute_value(player_data.get(attr, 0)) for attr in attrs) / len(attrs) if attrs else 0 for attrs in gameplay_attrs.values()]
-                
-                
-                # --- FIX: Append the first value to the end to CLOSE the shape ---
-                if category_values:
-                    category_values.append(category_values[0])
-
-                # Assign a color from the palette, looping if necessary
-                color = trace_palette[i % len(trace_palette)]
-                
-                fig1.add_trace(go.Scatterpolar(
-                    r=category_values, 
-                    # --- FIX: Use a closed list of labels that matches the data ---
-                    theta=gameplay_theta + [gameplay_theta[0]], 
-                    fill='toself', 
-                    name=player_map[uid],
-                    line=dict(color=color),
-                    fillcolor=f"rgba({','.join(str(c) for c in hex_to_rgb(color))}, 0.2)"
-                ))
-            
-            # --- UPDATED: Dynamic layout styling ---
-            fig1.update_layout(
-                polar=dict(
-                    radialaxis=dict(visible=True, range=[0, 20], tickfont=dict(color=font_color), gridcolor=grid_color),
-                    angularaxis=dict(tickfont=dict(size=12, color=font_color), direction="clockwise"),
-                    bgcolor=chart_bg_color
-                ),
-                showlegend=False, 
-                paper_bgcolor='rgba(0,0,0,0)', 
-                plot_bgcolor='rgba(0,0,0,0)', 
-                margin=dict(l=40, r=40, t=40, b=40)
-            )
+            fig1 = radar_figure(gameplay_attrs)
+            fig1.update_layout(**polar_layout, showlegend=False)
             st.plotly_chart(fig1, use_container_width=True)
 
         with chart_col2:
             st.subheader(meta_chart_title)
-            fig2 = go.Figure()
-            # --- FIX: Define the theta values for the loop ONCE ---
-            meta_theta = list(meta_categories.keys())
-
-            # --- UPDATED: Loop to build chart with dynamic colors ---
-            for i, uid in enumerate(selected_ids):
-                player_data = comparison_df[comparison_df['Unique ID'] == uid].iloc[0]
-                category_values = [sum(parse_attribute_value(player_data.get(attr, 0)) for attr in attrs) / len(attrs) if attrs else 0 for attrs in meta_categories.values()]
-
-                # --- FIX: Append the first value to the end to CLOSE the shape ---
-                if category_values:
-                    category_values.append(category_values[0])
-
-                color = trace_palette[i % len(trace_palette)]
-
-                fig2.add_trace(go.Scatterpolar(
-                    r=category_values, 
-                    # --- FIX: Use a closed list of labels that matches the data ---
-                    theta=meta_theta + [meta_theta[0]], 
-                    fill='toself', 
-                    name=player_map[uid],
-                    line=dict(color=color),
-                    fillcolor=f"rgba({','.join(str(c) for c in hex_to_rgb(color))}, 0.2)"
-                ))
-
-            # --- UPDATED: Dynamic layout styling ---
-            fig2.update_layout(
-                polar=dict(
-                    radialaxis=dict(visible=True, range=[0, 20], tickfont=dict(color=font_color), gridcolor=grid_color),
-                    angularaxis=dict(tickfont=dict(size=12, color=font_color), direction="clockwise"),
-                    bgcolor=chart_bg_color
-                ),
-                legend=dict(font=dict(color=font_color)), 
-                paper_bgcolor='rgba(0,0,0,0)', 
-                plot_bgcolor='rgba(0,0,0,0)', 
-                margin=dict(l=40, r=40, t=40, b=40)
-            )
+            fig2 = radar_figure(meta_categories)
+            fig2.update_layout(**polar_layout, legend=dict(font=dict(color=font_color)))
             st.plotly_chart(fig2, use_container_width=True)
 
         st.divider()
         st.subheader("Detailed Attribute Comparison")
 
-        # 1. Get a master set of all attribute names for quick lookups.
-        all_attributes_set = set(GLOBAL_STAT_CATEGORIES.keys()) | set(GK_STAT_CATEGORIES.keys())
-        
-        # 2. Prepare the DataFrame fully BEFORE styling.
-        df_display = comparison_df.copy()
-        df_display['Display Name'] = df_display['Unique ID'].map(player_map)
-        df_display['Assigned Roles'] = df_display['Assigned Roles'].apply(lambda roles: ', '.join(roles) if isinstance(roles, list) else roles)
-        
-        # Set index and transpose. Attributes are now the index.
-        df_display = df_display.set_index('Display Name').T
-
-        # 3. Convert attribute rows to numeric values for the styling logic.
-        for idx in df_display.index:
-            if idx in all_attributes_set:
-                df_display.loc[idx] = df_display.loc[idx].apply(lambda x: (int(x.split('-')[0]) + int(x.split('-')[1])) / 2 if isinstance(x, str) and '-' in x else x)
-                df_display.loc[idx] = pd.to_numeric(df_display.loc[idx], errors='coerce')
-        
-        # 4. Define the "smart" styling function.
-        def smart_styler(row):
-            if row.name == 'Personality':
-                return [color_personality(val) for val in row]
-            if row.name in all_attributes_set:
-                return [color_attribute_by_value(val) for val in row]
-            else:
-                return ['' for val in row]
-
-        # 5. Apply styling and formatting.
-        styler = df_display.style.format(na_rep='-', precision=0).apply(
-            smart_styler,
-            axis=1
-        )
-        
-        # This bypasses Streamlit's Arrow serialization and eliminates the warnings.
-        html = styler.to_html()
-        st.markdown(html, unsafe_allow_html=True)
\ No newline at end of file
+        # Rendered once per set of players; depends on nothing else on the page.
+        html = _comparison_table_html(tuple(sorted(selected_ids)))
+        st.markdown(html, unsafe_allow_html=True)
+
+
+@register_player_data_cache
+@st.cache_data
+def _comparison_table_html(selected_ids):
+    """
+    Styled HTML for the Detailed Attribute Comparison table of `selected_ids`
+    (a sorted tuple; columns follow database order either way). Built from
+    get_all_players() and cleared with the other player-data caches.
+    """
+    df = pd.DataFrame(get_all_players())
+    comparison_df = df[df['Unique ID'].isin(selected_ids)]
+
+    # 1. Prepare the DataFrame fully BEFORE styling.
+    df_display = comparison_df.copy()
+    df_display['Display Name'] = [f"{name} ({club})" for name, club in zip(df_display['Name'], df_display['Club'])]
+    df_display['Assigned Roles'] = df_display['Assigned Roles'].apply(lambda roles: ', '.join(roles) if isinstance(roles, list) else roles)
+
+    # 2. Convert attribute columns to numeric values for the styling logic
+    # (ranges become their mean, anything else unparsable shows as '-').
+    attr_cols = [col for col in df_display.columns if col in _ALL_ATTRS]
+    df_display[attr_cols] = df_display[attr_cols].apply(_parse_attr_values)
+
+    # Set index and transpose. Attributes are now the index.
+    df_display = df_display.set_index('Display Name').T
+
+    # 3. Build the whole style grid at once: attribute rows are binned into
+    # their color tiers, the Personality row is colored per cell and every
+    # other row is left unstyled.
+    styles = np.full(df_display.shape, '', dtype=object)
+    is_attr_row = df_display.index.isin(_ALL_ATTRS)
+    if is_attr_row.any():
+        styles[is_attr_row] = attribute_value_styles(df_display[is_attr_row].to_numpy(dtype=float, na_value=np.nan))
+    if 'Personality' in df_display.index:
+        styles[df_display.index.get_loc('Personality')] = [color_personality(val) for val in df_display.loc['Personality']]
+
+    # 4. Apply styling and formatting.
+    styler = df_display.style.format(na_rep='-', precision=0).apply(lambda _: styles, axis=None)
+
+    # This bypasses Streamlit's Arrow serialization and eliminates the warnings.
+    return styler.to_html()
@@ -13,11 +13,12 @@ from data_parser import force_update_single_player, load_data
 from talent_logic import calculate_talent_score, talent_age_cap_for_player
 from utils import (format_role_display, get_last_name, color_attribute_by_value,
                    color_personality, is_national_mode_active)
-from ui_components import display_custom_header, display_pros_and_cons, clear_all_caches
+from ui_components import display_custom_header, display_pros_and_cons, clear_all_caches, register_player_data_cache
 from role_analysis_logic import (analyze_player_for_role, get_top_roles_for_player,
                                  parse_attribute_value, ALL_GK_ROLES)
 
 
+@register_player_data_cache
 @st.cache_data
 def get_profile_pool(scope, user_club, second_club):
     """
@@ -95,10 +96,6 @@ def _display_development_chart(player, roles):
         hist = get_dwrs_history([uid], role)
         if hist.empty:
             continue
-        hist = hist.copy()
-        hist['dwrs_normalized'] = pd.to_numeric(
-            hist['dwrs_normalized'].astype(str).str.rstrip('%'), errors='coerce'
-        )
         series = hist.set_index('snapshot')['dwrs_normalized'].rename(format_role_display(role))
         history_series.append(series)
 
@@ -2,19 +2,38 @@
 
 import streamlit as st
 import pandas as pd
-from io import StringIO
 import math
 
 from sqlite_db import (get_user_club, get_second_team_club, get_favorite_tactics,
                        get_shortlist_ids, set_shortlist_ids, get_club_country)
-from constants import get_valid_roles, get_tactic_roles, get_personality_category
+from constants import get_personality_category, get_sorted_tactic_names
 from data_parser import get_player_role_matrix
-from utils import (get_last_name, get_natural_role_sorter, color_dwrs_by_value, value_to_float,
-                   format_role_display, color_personality, color_attribute_by_value)
+from utils import (get_natural_sorted_roles, format_role_display, color_personality, color_attribute_by_value,
+                   sort_tactics_favorites_first, dwrs_column_styles, top_dwrs_column_styles)
 from talent_logic import add_talent_column
 from ui_components import display_custom_header, clear_all_caches, personality_filter_controls, filter_df_by_personality
 
 
+@st.cache_data
+def _df_to_csv_bytes(df):
+    """A table's CSV download, serialized once per distinct table rather than
+    on every rerun whether or not the button is clicked."""
+    return df.to_csv(index=False).encode('utf-8')
+
+
+def _matrix_column_config(columns, score_cols):
+    """Fixed widths for the matrix tables so the frontend does not have to
+    measure every cell to size 30+ role columns. Number formatting stays on
+    the Styler, which also renders empty ratings as "-"."""
+    config = {score: st.column_config.NumberColumn(width='small') for score in score_cols}
+    if 'Name' in columns:
+        config['Name'] = st.column_config.TextColumn(width='medium')
+    if 'Age' in columns:
+        # Age is stored as text, so it keeps a text column
+        config['Age'] = st.column_config.TextColumn(width='small')
+    return config
+
+
 def player_role_matrix_page():
     #st.title("Player-Role Matrix")
     display_custom_header("Squad Matrix")
@@ -30,19 +49,10 @@ def player_role_matrix_page():
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         fav_tactic1, fav_tactic2 = get_favorite_tactics()
-        all_tactics = sorted(list(get_tactic_roles().keys()))
-        
-        # Create the sorted list
-        sorted_tactics = []
-        if fav_tactic1 and fav_tactic1 in all_tactics:
-            sorted_tactics.append(fav_tactic1)
-        if fav_tactic2 and fav_tactic2 in all_tactics and fav_tactic2 != fav_tactic1:
-            sorted_tactics.append(fav_tactic2)
+        all_tactics = get_sorted_tactic_names()
         
-        # Add remaining tactics
-        for tactic in all_tactics:
-            if tactic not in sorted_tactics:
-                sorted_tactics.append(tactic)
+        # Favorites first, then the remaining tactics
+        sorted_tactics = sort_tactics_favorites_first(fav_tactic1, fav_tactic2, all_tactics)
         
         tactic_options = ["All Roles"] + sorted_tactics
         
@@ -57,9 +67,7 @@ def player_role_matrix_page():
     with col4:
         hide_retired = st.checkbox("Hide 'Retired' Players", value=True)
     
-    role_sorter = get_natural_role_sorter()
-    base_roles = get_valid_roles() if selected_tactic == "All Roles" else list(set(get_tactic_roles()[selected_tactic].values()))
-    selected_roles = sorted(base_roles, key=lambda r: role_sorter.get(r, (99, 99)))
+    selected_roles = get_natural_sorted_roles(selected_tactic)
     full_matrix = get_player_role_matrix(user_club, second_team_club)
     
     if full_matrix.empty:
@@ -67,7 +75,7 @@ def player_role_matrix_page():
         return
 
     if hide_retired:
-        full_matrix = full_matrix[full_matrix['Club'].str.lower() != 'retired']
+        full_matrix = full_matrix[~full_matrix['IsRetired']]
 
     # Personality filter (applies to club, second-team and scouted tables below)
     allowed_personalities = personality_filter_controls(full_matrix, key_prefix="matrix")
@@ -119,7 +127,7 @@ def player_role_matrix_page():
             talent_filter_on = False
 
     if talent_filter_on:
-        age_num = pd.to_numeric(full_matrix['Age'], errors='coerce')
+        age_num = full_matrix['AgeNum']
         det_num = pd.to_numeric(full_matrix['Determination'], errors='coerce').fillna(0)
         wor_num = pd.to_numeric(full_matrix['Work Rate'], errors='coerce').fillna(0)
 
@@ -152,19 +160,19 @@ def player_role_matrix_page():
             st.info("No players match the current talent criteria.")
             return
 
-    my_club_matrix = full_matrix[full_matrix['Club'] == user_club].copy()
-    second_team_matrix = full_matrix[full_matrix['Club'] == second_team_club].copy() if second_team_club else pd.DataFrame()
+    # Read-only slices: the tables below only sort, filter and project them
+    my_club_matrix = full_matrix[full_matrix['Club'] == user_club]
+    second_team_matrix = full_matrix[full_matrix['Club'] == second_team_club] if second_team_club else None
     exclude_clubs = [user_club]
     if second_team_club: exclude_clubs.append(second_team_club)
-    scouted_matrix = full_matrix[~full_matrix['Club'].isin(exclude_clubs)].copy()
+    scouted_matrix = full_matrix[~full_matrix['Club'].isin(exclude_clubs)]
 
-    def prepare_and_display_df(df, title, key_suffix, display_cols, use_full_style=False, top_n=20):
+    def prepare_and_display_df(df, title, key_suffix, display_cols, use_full_style=False, top_n=20, page_size=50):
         st.subheader(title)
         
         # Data preparation and search logic (this is all correct)
         if not df.empty:
-            df['LastName'] = df['Name'].apply(get_last_name)
-            df = df.sort_values(by=['LastName', 'Name']).drop(columns=['LastName'])
+            df = df.sort_values(by=['LastName', 'Name'])
         search_term = st.text_input(f"Search by Name in {title}", key=f"search_{key_suffix}")
         if search_term:
             df = df[df['Name'].str.contains(search_term, case=False, na=False)]
@@ -172,72 +180,60 @@ def player_role_matrix_page():
             st.write("No players found for this category or matching the filter.")
             return
         existing_cols = [col for col in display_cols if col in df.columns]
-        df_display = df[existing_cols]
-        role_cols_df = [role for role in get_valid_roles() if role in df_display.columns]
+        df_table = df[existing_cols]
+
+        # Only the current page is styled and rendered; the CSV below still
+        # contains every matching row.
+        total_pages = math.ceil(len(df_table) / page_size)
+        page_key = f"page_{key_suffix}"
+        if st.session_state.get(page_key, 1) > total_pages:
+            st.session_state[page_key] = 1
+        if total_pages > 1:
+            page_c1, _ = st.columns([1, 3])
+            page_c1.number_input(f"Page (of {total_pages}):", min_value=1, max_value=total_pages, key=page_key)
+        start_idx = (st.session_state.get(page_key, 1) - 1) * page_size
+        df_display = df_table.iloc[start_idx:start_idx + page_size]
+        role_cols_df = df_display.columns.intersection(selected_roles, sort=False).tolist()
         # The Talent score column is formatted/colored like a DWRS value.
         score_cols = role_cols_df + [c for c in ('Talent',) if c in df_display.columns]
 
         # --- START OF CORRECTED STYLING LOGIC ---
-
-        # Base styler for number formatting is always applied.
-        styler = df_display.style.format("{:.0f}", subset=score_cols, na_rep="-")
-        if 'Talent' in df_display.columns:
-            styler = styler.apply(lambda col: [color_dwrs_by_value(v) for v in col], subset=['Talent'])
         mentality_cols = [c for c in ('Determination', 'Work Rate') if c in df_display.columns]
-        if mentality_cols:
-            styler = styler.map(color_attribute_by_value, subset=mentality_cols)
-
-        if use_full_style:
-            # For the "My Club" table, we use a smart function that styles
-            # only the cells that are not empty (not None/NaN).
-            
-            def smart_full_styler(column):
-                styles = [''] * len(column)
-                # Find the index positions of all cells that have a valid number
-                valid_indices = column.dropna().index
-                # For ONLY those valid cells, calculate and apply the color style
-                for index in valid_indices:
-                    # get_loc finds the integer position of the index label
-                    styles[column.index.get_loc(index)] = color_dwrs_by_value(column[index])
-                return styles
-
-            # Apply this intelligent function to each role column
-            styler = styler.apply(smart_full_styler, subset=role_cols_df)
+        column_config = _matrix_column_config(df_display.columns, score_cols)
 
+        if not score_cols and not mentality_cols and 'Personality' not in df_display.columns:
+            # Nothing to format or color: skip building a Styler altogether.
+            st.dataframe(df_display, use_container_width=True, hide_index=True, column_config=column_config)
         else:
-            # For the large scouted table, we continue to use the high-performance "Top N" logic.
-            for role in role_cols_df:
-                top_indices = df_display[role].nlargest(top_n).index
-                styler = styler.apply(
-                    lambda x: x.map(color_dwrs_by_value),
-                    subset=pd.IndexSlice[top_indices, [role]]
-                )
-
-        if 'Personality' in df_display.columns:
-            styler = styler.format(subset=['Personality'], na_rep="-")
-            styler = styler.map(color_personality, subset=['Personality'])
-
-        st.dataframe(styler, use_container_width=True, hide_index=True)
+            # Base styler for number formatting is always applied.
+            styler = df_display.style.format("{:.0f}", subset=score_cols, na_rep="-")
+            if 'Talent' in df_display.columns:
+                styler = styler.apply(dwrs_column_styles, subset=['Talent'])
+            if mentality_cols:
+                styler = styler.map(color_attribute_by_value, subset=mentality_cols)
+
+            # Role columns with no ratings at all (e.g. bench players) have
+            # nothing to color.
+            if role_cols_df and df_display[role_cols_df].notna().any().any():
+                if use_full_style:
+                    # For the "My Club" table, style only the cells that are not
+                    # empty (not None/NaN), one vectorized pass per role column.
+                    styler = styler.apply(dwrs_column_styles, subset=role_cols_df)
+
+                else:
+                    # For the large scouted table, only each role's "Top N" ratings
+                    # are colored, all role columns in one Styler pass.
+                    styler = styler.apply(top_dwrs_column_styles, top_n=top_n, subset=role_cols_df)
+
+            if 'Personality' in df_display.columns:
+                styler = styler.format(subset=['Personality'], na_rep="-")
+                styler = styler.map(color_personality, subset=['Personality'])
+
+            st.dataframe(styler, use_container_width=True, hide_index=True, column_config=column_config)
         # --- END OF CORRECTED STYLING LOGIC ---
         
-        # CSV download button (unchanged)
-        csv_buffer = StringIO()
-        df_display.to_csv(csv_buffer, index=False)
-        st.download_button(label=f"Download {title} Matrix as CSV", data=csv_buffer.getvalue(), file_name=f"{title.lower().replace(' ', '_')}_matrix.csv", mime="text/csv")
-
-    # Calculate the total number of cells that will be rendered
-    num_rows, num_cols = scouted_matrix.shape
-    total_cells = num_rows * len(selected_roles) # A good approximation
-    
-    # Pandas has a default safety limit. We'll increase it if our table is larger,
-    # then restore the original value afterwards to avoid app-wide side effects.
-    current_max = pd.get_option("styler.render.max_elements")
-    limit_was_increased = False
-    if total_cells > current_max:
-        new_limit = int(total_cells * 1.1)
-        pd.set_option("styler.render.max_elements", new_limit)
-        limit_was_increased = True
-        st.info(f"💡 Large dataset detected. Temporarily increasing display limit to handle {total_cells:,} cells.")
+        # CSV download button
+        st.download_button(label=f"Download {title} Matrix as CSV", data=_df_to_csv_bytes(df_table), file_name=f"{title.lower().replace(' ', '_')}_matrix.csv", mime="text/csv")
 
     my_club_base_cols = ["Name", "Age", "Position", "Personality", "Wage"]
     if show_extra_details:
@@ -264,10 +260,6 @@ def player_role_matrix_page():
         if second_team_club and show_second_team:
             prepare_and_display_df(second_team_matrix, f"Players from {second_team_club} (Second Team)", "second_team", my_club_display_cols, use_full_style=True)
 
-    # Restore the original pandas option to avoid persistent app-wide side effects
-    if limit_was_increased:
-        pd.set_option("styler.render.max_elements", current_max)
-
     st.subheader("Scouted Players")
     
     if scouted_matrix.empty:
@@ -280,10 +272,9 @@ def player_role_matrix_page():
             with sort_c1:
                 talent_sort_options = ["Talent"] if talent_filter_on else []
                 sort_options = ["Name", "Shortlist"] + talent_sort_options + selected_roles
-                sort_by = st.selectbox(
-                    "Filter & Sort by", options=sort_options,
-                    format_func=lambda x: x if x in ("Name", "Shortlist", "Talent") else format_role_display(x)
-                )
+                sort_labels = {opt: opt for opt in ("Name", "Shortlist", "Talent")}
+                sort_labels.update({role: format_role_display(role) for role in selected_roles})
+                sort_by = st.selectbox("Filter & Sort by", options=sort_options, format_func=sort_labels.__getitem__)
             with sort_c2:
                 # Disable direction for shortlist filter as it doesn't apply
                 sort_direction = st.radio("Direction", ["Descending", "Ascending"], horizontal=True, index=0, 
@@ -295,24 +286,21 @@ def player_role_matrix_page():
             with age_c2:
                 max_age = st.slider("Filter by Max Age", 15, 40, 30)
             with val_c3:
-                scouted_matrix['ValueNum'] = scouted_matrix['Transfer Value'].apply(value_to_float)
                 buyable = scouted_matrix[scouted_matrix['ValueNum'] < 2_000_000_000]
                 max_val_possible = buyable['ValueNum'].max() if not buyable.empty else 100_000_000
                 slider_max = min(max_val_possible, 200_000_000)
                 max_value = st.slider("Filter by Max Value (€M)", 0.0, slider_max / 1_000_000, slider_max / 1_000_000, 0.5) * 1_000_000
 
         # --- Apply Filtering and Sorting ---
-        scouted_matrix['AgeNum'] = pd.to_numeric(scouted_matrix['Age'], errors='coerce')
-        
         # Apply filters
         if sort_by == "Shortlist":
-            filtered_df = scouted_matrix[scouted_matrix['Unique ID'].isin(shortlist_ids)].copy()
+            filtered_df = scouted_matrix[scouted_matrix['Unique ID'].isin(shortlist_ids)]
         else:
             # Original filtering logic
             filtered_df = scouted_matrix[
                 (scouted_matrix['AgeNum'] <= max_age) &
                 (scouted_matrix['ValueNum'] <= max_value)
-            ].copy()
+            ]
             
             if sort_by not in ("Name", "Talent"):
                 # The DWRS range filter applies to role columns only; the
@@ -329,8 +317,7 @@ def player_role_matrix_page():
         # Apply sorting
         is_ascending = (sort_direction == "Ascending")
         if sort_by == "Name" or sort_by == "Shortlist":
-            filtered_df['LastName'] = filtered_df['Name'].apply(get_last_name)
-            sorted_df = filtered_df.sort_values(by='LastName', ascending=is_ascending).drop(columns=['LastName'])
+            sorted_df = filtered_df.sort_values(by='LastNameOrder', ascending=is_ascending)
         else: # This block now only runs for sorting by a role
             sorted_df = filtered_df.sort_values(by=sort_by, ascending=is_ascending, na_position='last')
         
@@ -361,17 +348,11 @@ def player_role_matrix_page():
 
         # --- Display and Full Styling ---
         df_display = df_paginated[[c for c in scouted_display_cols if c in df_paginated.columns]]
-        role_cols_df = [role for role in get_valid_roles() if role in df_display.columns]
+        role_cols_df = df_display.columns.intersection(selected_roles, sort=False).tolist()
         score_cols = role_cols_df + [c for c in ('Talent',) if c in df_display.columns]
 
         styler = df_display.style.format("{:.0f}", subset=score_cols, na_rep="-")
-        def smart_full_styler(column):
-            styles = [''] * len(column)
-            valid_indices = column.dropna().index
-            for index in valid_indices:
-                styles[column.index.get_loc(index)] = color_dwrs_by_value(column[index])
-            return styles
-        styler = styler.apply(smart_full_styler, subset=score_cols)
+        styler = styler.apply(dwrs_column_styles, subset=score_cols)
         mentality_cols = [c for c in ('Determination', 'Work Rate') if c in df_display.columns]
         if mentality_cols:
             styler = styler.map(color_attribute_by_value, subset=mentality_cols)
@@ -380,7 +361,7 @@ def player_role_matrix_page():
             styler = styler.format(subset=['Personality'], na_rep="-")
             styler = styler.map(color_personality, subset=['Personality'])
 
-        st.dataframe(styler, use_container_width=True, hide_index=True)
+        st.dataframe(styler, use_container_width=True, hide_index=True, column_config=_matrix_column_config(df_display.columns, score_cols))
 
         # --- CHANGE 3: Add the "Add to Shortlist" widget ---
         # --- CONTEXT-AWARE SHORTLIST MANAGEMENT ---
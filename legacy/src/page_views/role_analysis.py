@@ -6,10 +6,12 @@ import pandas as pd
 from sqlite_db import get_user_club, get_second_team_club, get_all_players
 from constants import get_valid_roles
 from data_parser import get_players_by_role
-from utils import format_role_display, color_dwrs_by_value, get_last_name, color_personality
-from ui_components import display_custom_header, display_pros_and_cons, personality_filter_controls, filter_df_by_personality
+from utils import format_role_display, dwrs_column_styles, get_last_name, color_personality
+from ui_components import (display_custom_header, display_pros_and_cons, personality_filter_controls, filter_df_by_personality,
+                           register_player_data_cache)
 from role_analysis_logic import analyze_player_for_role
 
+@register_player_data_cache
 @st.cache_data
 def get_role_pool(role, scope, user_club, second_club):
     """
@@ -33,6 +35,11 @@ def get_role_pool(role, scope, user_club, second_club):
     pool.sort(key=lambda p: get_last_name(p.get('Name', '')))
     return pool
 
+_ROLE_TABLE_COLUMN_CONFIG = {
+    "DWRS Rating (Absolute)": st.column_config.NumberColumn(width="small"),
+    "DWRS Rating (Normalized)": st.column_config.TextColumn(width="small"),
+}
+
 def display_styled_role_df(df, title, use_full_style=False, top_n=200):
     st.subheader(title)
     if df.empty:
@@ -50,7 +57,7 @@ def display_styled_role_df(df, title, use_full_style=False, top_n=200):
     if use_full_style:
         # For small club tables, style the entire column
         styler = styler.apply(
-            lambda x: x.map(color_dwrs_by_value),
+            dwrs_column_styles,
             subset=[column_to_style]
         )
     else:
@@ -58,7 +65,7 @@ def display_styled_role_df(df, title, use_full_style=False, top_n=200):
         # The dataframe is already sorted, so we just need the top N indices
         top_indices = df.head(top_n).index
         styler = styler.apply(
-            lambda x: x.map(color_dwrs_by_value),
+            dwrs_column_styles,
             subset=pd.IndexSlice[top_indices, [column_to_style]]
         )
 
@@ -66,7 +73,7 @@ def display_styled_role_df(df, title, use_full_style=False, top_n=200):
         styler = styler.format(subset=['Personality'], na_rep="-")
         styler = styler.map(color_personality, subset=['Personality'])
 
-    st.dataframe(styler, use_container_width=True, hide_index=True)
+    st.dataframe(styler, use_container_width=True, hide_index=True, column_config=_ROLE_TABLE_COLUMN_CONFIG)
 
 def role_analysis_page():
     display_custom_header("Role Analysis")
@@ -3,24 +3,23 @@ import os
 import streamlit as st
 import re
 
-from constants import get_tactic_roles, FIELD_PLAYER_APT_OPTIONS, GK_APT_OPTIONS
+from constants import FIELD_PLAYER_APT_OPTIONS, GK_APT_OPTIONS, get_sorted_tactic_names
 from config_handler import (get_theme_settings, save_theme_settings, 
                           get_apt_weight, set_apt_weight, get_weight, set_weight, get_role_multiplier, 
                           set_role_multiplier, get_age_threshold, set_age_threshold, get_selection_bonus, 
                           set_selection_bonus, get_db_name, set_db_name, get_squad_management_setting, 
                           set_squad_management_setting, get_gap_analysis_setting,
-                          set_gap_analysis_setting)
+                          set_gap_analysis_setting, get_outfield_weights, get_gk_weights)
 from definitions_handler import PROJECT_ROOT
 from utils import calculate_contrast_ratio, get_available_databases
 from ui_components import clear_all_caches, display_custom_header
 from theme_handler import set_theme_toml
-from sqlite_db import (update_dwrs_ratings, get_favorite_tactics, set_favorite_tactics, get_club_identity,
+from sqlite_db import (recalculate_all_dwrs_ratings, get_favorite_tactics, set_favorite_tactics, get_club_identity,
                        set_club_identity, get_prunable_player_info, prune_scouted_players, get_national_mode_enabled,
                        set_national_mode_enabled, get_national_team_settings, set_national_team_settings,
                        get_national_favorite_tactics, set_national_favorite_tactics,
                        get_club_country, set_club_country, get_distinct_nationalities)
 from data_parser import load_data
-from constants import get_valid_roles
 
 def settings_page():
     display_custom_header("Settings")
@@ -32,8 +31,8 @@ def settings_page():
     # --- STEP 1: Store the CURRENT state of all DWRS-related settings ---
     # We do this before the widgets are drawn.
     old_dwrs_weights = {
-        **{cat: get_weight(cat.lower().replace(" ", "_"), val) for cat, val in { "Extremely Important": 8.0, "Important": 4.0, "Good": 2.0, "Decent": 1.0, "Almost Irrelevant": 0.2 }.items()},
-        **{"gk_" + cat: get_weight("gk_" + cat.lower().replace(" ", "_"), val) for cat, val in { "Top Importance": 10.0, "High Importance": 8.0, "Medium Importance": 6.0, "Key": 4.0, "Preferable": 2.0, "Other": 0.5 }.items()}
+        **get_outfield_weights(),
+        **{"gk_" + cat: weight for cat, weight in get_gk_weights().items()}
     }
     old_role_multipliers = {
         'key': get_role_multiplier('key'),
@@ -45,7 +44,7 @@ def settings_page():
         st.info("The selected tactics will appear at the top of the list on the analysis pages.")
         
         # Get all available tactics and add a "None" option
-        all_tactics = ["None"] + sorted(list(get_tactic_roles().keys()))
+        all_tactics = ["None"] + get_sorted_tactic_names()
         
         # Get currently saved favorite tactics
         fav_tactic1, fav_tactic2 = get_favorite_tactics()
@@ -453,7 +452,7 @@ def settings_page():
             with st.spinner("Recalculating all DWRS ratings... This may take a moment."):
                 df = load_data()
                 if df is not None:
-                    update_dwrs_ratings(df, get_valid_roles())
+                    recalculate_all_dwrs_ratings(df)
             st.success("Settings saved successfully! All DWRS ratings have been recalculated.", icon="✅")
         else:
             st.toast("Settings saved! No DWRS recalculation was needed.", icon="✅")
@@ -5,6 +5,12 @@ import pandas as pd
 from ui_components import display_custom_header
 from sqlite_db import get_shortlist_ids, set_shortlist_ids
 
+def _sorted_rows(players_df):
+    """The list rows in name order, as named tuples (no Series built per row)."""
+    return (players_df.sort_values(by="Name")[['Unique ID', 'Name', 'Age', 'Club', 'Position']]
+            .rename(columns={'Unique ID': 'UniqueID'})
+            .itertuples(index=False))
+
 def shortlist_page(players):
     """
     A dedicated page for viewing all players and managing a persistent shortlist.
@@ -36,22 +42,22 @@ def shortlist_page(players):
             if available_players_df.empty:
                 st.info("No available players match your search, or all players have been shortlisted.")
             else:
-                for _, player in available_players_df.sort_values(by="Name").iterrows():
+                for player in _sorted_rows(available_players_df):
                     row = st.columns([0.8, 0.2])
                     with row[0]:
                         # --- THIS IS THE FIX ---
                         # Try to convert age to int, but use a fallback if it fails
                         try:
-                            age_display = int(player['Age'])
+                            age_display = int(player.Age)
                         except (ValueError, TypeError):
                             age_display = "N/A" # Or you could use 0, or "?"
                         
-                        st.markdown(f"**{player['Name']}** ({age_display})")
+                        st.markdown(f"**{player.Name}** ({age_display})")
                         # --- END OF FIX ---
-                        st.caption(f"{player['Club']} | {player['Position']}")
+                        st.caption(f"{player.Club} | {player.Position}")
                     with row[1]:
-                        if st.button("Add", key=f"add_shortlist_{player['Unique ID']}", use_container_width=True):
-                            st.session_state.shortlist_selection.add(player['Unique ID'])
+                        if st.button("Add", key=f"add_shortlist_{player.UniqueID}", use_container_width=True):
+                            st.session_state.shortlist_selection.add(player.UniqueID)
                             st.rerun()
                     st.divider()
 
@@ -65,21 +71,21 @@ def shortlist_page(players):
             if shortlist_df.empty:
                 st.info("No players have been shortlisted yet.")
             else:
-                for _, player in shortlist_df.sort_values(by="Name").iterrows():
+                for player in _sorted_rows(shortlist_df):
                     row = st.columns([0.8, 0.2])
                     with row[0]:
                         # --- APPLY THE SAME FIX HERE ---
                         try:
-                            age_display = int(player['Age'])
+                            age_display = int(player.Age)
                         except (ValueError, TypeError):
                             age_display = "N/A"
 
-                        st.markdown(f"**{player['Name']}** ({age_display})")
+                        st.markdown(f"**{player.Name}** ({age_display})")
                         # --- END OF FIX ---
-                        st.caption(f"{player['Club']} | {player['Position']}")
+                        st.caption(f"{player.Club} | {player.Position}")
                     with row[1]:
-                        if st.button("Remove", key=f"remove_shortlist_{player['Unique ID']}", use_container_width=True):
-                            st.session_state.shortlist_selection.remove(player['Unique ID'])
+                        if st.button("Remove", key=f"remove_shortlist_{player.UniqueID}", use_container_width=True):
+                            st.session_state.shortlist_selection.remove(player.UniqueID)
                             st.rerun()
                     st.divider()
 
@@ -8,8 +8,8 @@ from sqlite_db import (get_all_players, get_user_club, get_second_team_club,
 from squad_logic import get_master_role_ratings
 from constants import get_tactic_roles
 from tactic_explorer_logic import analyze_all_tactics, STRATUM_ORDER
-from utils import format_role_display, color_dwrs_by_value, is_national_mode_active
-from ui_components import display_custom_header
+from utils import format_role_display, dwrs_column_styles, is_national_mode_active
+from ui_components import display_custom_header, register_player_data_cache
 
 STRATUM_SHORT = {
     "Goalkeeper": "GK", "Defense": "DEF", "Defensive Midfield": "DM",
@@ -17,6 +17,7 @@ STRATUM_SHORT = {
 }
 
 
+@register_player_data_cache
 @st.cache_data
 def _run_explorer(user_club, second_team_club):
     """Cached across reruns; rebuilt when player data changes (clear_all_caches)."""
@@ -29,6 +30,7 @@ def _run_explorer(user_club, second_team_club):
     return analyze_all_tactics(pool, master), len(pool)
 
 
+@register_player_data_cache
 @st.cache_data
 def _run_explorer_national(squad_ids):
     """National variant: pool is the saved national squad (the squad-ID tuple
@@ -116,8 +118,7 @@ def tactic_explorer_page():
             return ""
 
     styler = table.style.format({c: "{:.0f}" for c in strength_cols}, na_rep="–")
-    for c in strength_cols:
-        styler = styler.map(color_dwrs_by_value, subset=[c])
+    styler = styler.apply(dwrs_column_styles, subset=strength_cols)
     styler = styler.map(_warn_if_positive, subset=["Empty", "Thin"])
 
     st.dataframe(styler, use_container_width=True, hide_index=True)
@@ -4,7 +4,7 @@ import streamlit as st
 import pandas as pd
 
 from sqlite_db import get_user_club, get_second_team_club, get_favorite_tactics, update_player_transfer_status, update_player_loan_status, update_player_club
-from constants import get_tactic_roles
+from constants import get_tactic_roles, get_sorted_tactic_names
 from squad_logic import calculate_squad_and_surplus, calculate_development_squads, get_master_role_ratings
 from ui_components import display_custom_header
 
@@ -38,7 +38,7 @@ def transfer_loan_management_page(players):
         return
 
     fav_tactic1, _ = get_favorite_tactics()
-    all_tactics = sorted(list(get_tactic_roles().keys()))
+    all_tactics = get_sorted_tactic_names()
     try:
         default_index = all_tactics.index(fav_tactic1) if fav_tactic1 in all_tactics else 0
     except ValueError: default_index = 0
@@ -7,7 +7,7 @@
 # This module is intentionally UI-free so it can be reused by the Role
 # Analysis page, a future Player Profile view, or anywhere else.
 
-from constants import get_role_specific_weights, get_player_roles, GLOBAL_STAT_CATEGORIES, GK_STAT_CATEGORIES, get_personality_category
+from constants import get_role_specific_weights, get_player_roles, GLOBAL_STAT_BY_CATEGORY, GK_STAT_BY_CATEGORY, get_personality_category
 
 # Roles that use goalkeeper attributes / are evaluated as keepers.
 ALL_GK_ROLES = ["GK-D", "SK-D", "SK-S", "SK-A"]
@@ -113,11 +113,11 @@ def analyze_player_for_role(player, role, include_global=False, include_personal
     if include_global:
         already = set(key_attrs) | set(pref_attrs)
         if role in ALL_GK_ROLES:
-            global_attrs = [a for a, cat in GK_STAT_CATEGORIES.items()
-                            if cat in ("Top Importance", "High Importance")]
+            global_attrs = (GK_STAT_BY_CATEGORY.get("Top Importance", ())
+                            + GK_STAT_BY_CATEGORY.get("High Importance", ()))
         else:
-            global_attrs = [a for a, cat in GLOBAL_STAT_CATEGORIES.items()
-                            if cat in ("Extremely Important", "Important")]
+            global_attrs = (GLOBAL_STAT_BY_CATEGORY.get("Extremely Important", ())
+                            + GLOBAL_STAT_BY_CATEGORY.get("Important", ()))
         for attr in global_attrs:
             if attr in already:
                 continue
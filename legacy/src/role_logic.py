@@ -18,7 +18,8 @@ def auto_assign_roles_to_unassigned():
     if all_players_df.empty:
         return 0
 
-    unassigned_df = all_players_df[all_players_df['Assigned Roles'].apply(lambda x: not isinstance(x, list) or not x)]
+    # Missing/non-list values have no length (NaN -> 0) and count as unassigned.
+    unassigned_df = all_players_df[all_players_df['Assigned Roles'].str.len().fillna(0).eq(0)]
 
     if unassigned_df.empty:
         return 0
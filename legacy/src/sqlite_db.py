@@ -67,6 +67,8 @@ def init_db():
             cursor.execute(f'UPDATE players SET "Agreed Playing Time" = agreed_playing_time WHERE "Agreed Playing Time" IS NULL')
             cursor.execute('ALTER TABLE players DROP COLUMN "agreed_playing_time"')
         except sqlite3.OperationalError: pass
+    # Club lookups (get_club_players) filter on this column, so index it.
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_players_club ON players("Club")')
 
     # --- MIGRATION BLOCK 3: Create Settings Table ---
     cursor.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
@@ -145,8 +147,9 @@ def init_db():
                     conn.commit()
                     df = pd.DataFrame(get_all_players())
                     if not df.empty:
-                        update_dwrs_ratings(df, get_valid_roles())
+                        recalculate_all_dwrs_ratings(df)
                     st.cache_data.clear()
+                    st.cache_resource.clear()
                     st.success("Database upgrade successful! The app will now reload.")
                     st.rerun()
                 except Exception as e:
@@ -346,8 +349,8 @@ def set_primary_role(unique_id, role):
 
 def update_dwrs_ratings(df, valid_roles, player_ids_to_update=None):
     from analytics import build_attribute_matrix, calculate_dwrs_role_batch
-    from config_handler import get_weight
-    from constants import WEIGHT_DEFAULTS, GK_WEIGHT_DEFAULTS, get_gk_roles
+    from config_handler import get_outfield_weights, get_gk_weights
+    from constants import get_gk_roles
     import numpy as np
 
     conn = connect_db()
@@ -364,8 +367,8 @@ def update_dwrs_ratings(df, valid_roles, player_ids_to_update=None):
         conn.close()
         return
 
-    weights = {cat: get_weight(cat.lower().replace(" ", "_"), default) for cat, default in WEIGHT_DEFAULTS.items()}
-    gk_weights = {cat: get_weight("gk_" + cat.lower().replace(" ", "_"), default) for cat, default in GK_WEIGHT_DEFAULTS.items()}
+    weights = get_outfield_weights()
+    gk_weights = get_gk_weights()
     all_gk_roles = set(get_gk_roles())
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
@@ -376,7 +379,11 @@ def update_dwrs_ratings(df, valid_roles, player_ids_to_update=None):
             SELECT unique_id, role, MAX(timestamp) FROM dwrs_ratings GROUP BY unique_id, role
         )
     """)
-    latest_ratings_dict = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+    latest_df = pd.DataFrame(cursor.fetchall(), columns=['unique_id', 'role', 'dwrs_normalized'])
+    # Parse the stored "85%" strings once, vectorized, and keep one
+    # uid-indexed Series per role for the comparison below.
+    latest_df['dwrs_normalized'] = pd.to_numeric(latest_df['dwrs_normalized'].str.strip('%'), errors='coerce')
+    latest_by_role = {role: grp.set_index('unique_id')['dwrs_normalized'] for role, grp in latest_df.groupby('role')}
 
     # --- Vectorized recalculation ---
     # Parse every attribute column once, group player rows by assigned role,
@@ -401,15 +408,27 @@ def update_dwrs_ratings(df, valid_roles, player_ids_to_update=None):
         weights_to_use = gk_weights if role in all_gk_roles else weights
         absolute_arr, normalized_arr = calculate_dwrs_role_batch(attr_matrix, role, weights_to_use, rows)
 
-        for j, i in enumerate(row_list):
-            uid = uids[i]
-            new_value = normalized_arr[j]
+        role_uids = [uids[i] for i in row_list]
+        old_series = latest_by_role.get(role)
+        if old_series is None:
+            changed = np.ones(len(row_list), dtype=bool)
+        else:
+            old_arr = old_series.reindex(role_uids).to_numpy(dtype=np.float64)
             # Insert only if it's a new entry or changed by at least 1%
-            old_normalized = latest_ratings_dict.get((uid, role))
-            if old_normalized is None or abs(new_value - float(old_normalized.strip('%'))) >= 1.0:
-                ratings_to_insert.append(
-                    (uid, role, float(absolute_arr[j]), f"{new_value:.0f}%", timestamp)
-                )
+            changed = np.isnan(old_arr) | (np.abs(normalized_arr - old_arr) >= 1.0)
+        if not changed.any():
+            continue
+
+        # normalized_arr is already rounded to whole numbers, so the display
+        # label is a plain int cast plus '%', done for the whole batch at once.
+        labels = np.char.add(normalized_arr[changed].astype(np.int64).astype(str), '%')
+        ratings_to_insert.extend(zip(
+            np.asarray(role_uids, dtype=object)[changed].tolist(),
+            [role] * int(changed.sum()),
+            absolute_arr[changed].astype(float).tolist(),
+            labels.tolist(),
+            [timestamp] * int(changed.sum()),
+        ))
 
     if ratings_to_insert:
         # We use a simple INSERT here to add a new historical record.
@@ -421,6 +440,54 @@ def update_dwrs_ratings(df, valid_roles, player_ids_to_update=None):
     conn.commit()
     conn.close()
 
+def get_dwrs_signature():
+    """Weights signature the stored ratings were last fully calculated with."""
+    conn = connect_db()
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM settings WHERE key = 'dwrs_weights_signature'")
+    result = cursor.fetchone()
+    conn.close()
+    return result[0] if result else None
+
+def set_dwrs_signature(signature):
+    conn = connect_db()
+    cursor = conn.cursor()
+    cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', ("dwrs_weights_signature", signature))
+    conn.commit()
+    conn.close()
+
+def recalculate_all_dwrs_ratings(df):
+    """
+    Full recalculation of every player's ratings, recording the weights
+    signature they were produced with.
+    """
+    from analytics import dwrs_weights_signature
+    update_dwrs_ratings(df, get_valid_roles())
+    set_dwrs_signature(dwrs_weights_signature())
+
+def refresh_stale_dwrs_ratings(df):
+    """
+    Ratings are persisted in dwrs_ratings, so pages only ever SELECT them.
+    They go stale when the weights change outside the Settings page (hand-
+    edited config.ini / definitions.json, or switching to a database last
+    rated under other weights, since weights are global). This recalculates
+    lazily, once, when the stored signature no longer matches.
+    Returns True if a recalculation happened.
+    """
+    from analytics import dwrs_weights_signature
+    stored = get_dwrs_signature()
+    current = dwrs_weights_signature()
+    if stored == current:
+        return False
+    if stored is None:
+        # Databases from before signatures existed: assume their ratings match
+        # the current weights (the old behaviour) and start tracking from here.
+        set_dwrs_signature(current)
+        return False
+    with st.spinner("DWRS weights changed since the last calculation. Recalculating all ratings..."):
+        recalculate_all_dwrs_ratings(df)
+    return True
+
 def _parse_list_column(value, cache):
     """Parse a stored list string (e.g. \"['CD-D', 'DM-S']\") into a list.
     The same strings repeat thousands of times across a big database, so
@@ -437,16 +504,17 @@ def _parse_list_column(value, cache):
         cache[value] = cached
     return list(cached)
 
-@st.cache_data
-def get_all_players():
+def _fetch_players(query, params=()):
+    """Run a SELECT over players and return parsed player dicts."""
     conn = connect_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM players')
+    cursor.execute(query, params)
     rows = cursor.fetchall()
 
     # Get column names directly from the cursor description.
     # This guarantees the names are in the same order as the data in each row.
     columns = [description[0] for description in cursor.description]
+    conn.close()
 
     eval_cache = {}
     players = []
@@ -455,10 +523,43 @@ def get_all_players():
         player['Assigned Roles'] = _parse_list_column(player.get('Assigned Roles'), eval_cache)
         player['natural_positions'] = _parse_list_column(player.get('natural_positions'), eval_cache)
         players.append(player)
-    conn.close()
-    return players if players else []
+    return players
 
+@st.cache_data
+def get_all_players():
+    return _fetch_players('SELECT * FROM players')
+
+@st.cache_data
+def get_players_with_role(role):
+    """
+    Like get_all_players(), but only rows whose "Assigned Roles" contain
+    `role`. Roles are stored as str(list), so the quoted role code is
+    matched with instr() (case-sensitive, no LIKE wildcards) and the parsed
+    list is checked again to rule out partial matches.
+    """
+    players = _fetch_players('SELECT * FROM players WHERE instr("Assigned Roles", ?) > 0', (repr(role),))
+    return [p for p in players if role in p['Assigned Roles']]
+
+@st.cache_data
+def get_club_players(club):
+    """Players of one club, straight from SQL and cached per club name, so
+    pages don't rescan the full player list on every rerun."""
+    if not club: return []
+    return _fetch_players('SELECT * FROM players WHERE Club = ?', (club,))
+
+@st.cache_data
+def get_national_squad_players():
+    """Players currently in the national squad. Cleared by set_national_squad_ids()."""
+    return _fetch_players('SELECT p.* FROM players p JOIN national_squad n ON n.player_unique_id = p."Unique ID"')
+
+def get_player_by_id(unique_id):
+    """One player by primary key, or None."""
+    players = _fetch_players('SELECT * FROM players WHERE "Unique ID" = ?', (unique_id,))
+    return players[0] if players else None
+
+@st.cache_data
 def get_user_club():
+    """Read on every rerun by most pages. Cleared by set_user_club()."""
     conn = connect_db()
     cursor = conn.cursor()
     cursor.execute('SELECT value FROM settings WHERE key = "user_club"')
@@ -472,6 +573,7 @@ def set_user_club(club):
     cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', ("user_club", club))
     conn.commit()
     conn.close()
+    get_user_club.clear()
 
 def get_second_team_club():
     conn = connect_db()
@@ -508,21 +610,67 @@ def get_dwrs_history(unique_ids, role=None):
         WHERE unique_id IN ({placeholders})
     """
     
-    if role and role != "All Roles":
+    if isinstance(role, (list, tuple, set)):
+        # Several roles in one round trip; the result is long-format with a
+        # 'role' column for the caller to group on.
+        roles = list(role)
+        if not roles: return pd.DataFrame()
+        role_placeholders = ','.join(['?'] * len(roles))
+        query = base_query + f" AND role IN ({role_placeholders}) ORDER BY unique_id, role, timestamp"
+        params = list(unique_ids) + roles
+    elif role and role != "All Roles":
         query = base_query + " AND role = ? ORDER BY unique_id, role, timestamp"
-        params = unique_ids + [role]
+        params = list(unique_ids) + [role]
     else:
         query = base_query + " ORDER BY unique_id, role, timestamp"
-        params = unique_ids
+        params = list(unique_ids)
     # --- END NEW SQL LOGIC ---
 
     df = pd.read_sql_query(query, conn, params=params)
     df['timestamp'] = pd.to_datetime(df['timestamp'])
+    # Parse the stored "85%" strings once here so callers only ever see
+    # numbers; float32 is plenty for charting whole-number percentages.
+    df['dwrs_normalized'] = pd.to_numeric(df['dwrs_normalized'].astype(str).str.rstrip('%'), errors='coerce').astype('float32')
     conn.close()
     return df
 
+def get_dwrs_history_bulk(pairs):
+    """
+    History for an arbitrary set of (unique_id, role) pairs in one query.
+    The pairs go into a temp table (one executemany) that the history table
+    is joined against, instead of one query per role plus filtering
+    afterwards. Same long-format columns as get_dwrs_history().
+    """
+    if not pairs: return pd.DataFrame()
+    conn = connect_db()
+    cursor = conn.cursor()
+    # Temp table and sort space stay in RAM; bigger page cache for the join.
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.execute("PRAGMA cache_size = -64000")
+    cursor.execute("CREATE TEMP TABLE wanted_pairs (unique_id TEXT, role TEXT, PRIMARY KEY (unique_id, role))")
+    cursor.executemany("INSERT OR IGNORE INTO wanted_pairs (unique_id, role) VALUES (?, ?)", pairs)
+
+    query = """
+        SELECT
+            d.unique_id,
+            d.role,
+            d.dwrs_normalized,
+            d.timestamp,
+            DENSE_RANK() OVER (PARTITION BY d.unique_id, d.role ORDER BY d.timestamp) as snapshot
+        FROM dwrs_ratings d
+        JOIN wanted_pairs w ON w.unique_id = d.unique_id AND w.role = d.role
+        ORDER BY d.unique_id, d.role, d.timestamp
+    """
+    df = pd.read_sql_query(query, conn)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['dwrs_normalized'] = pd.to_numeric(df['dwrs_normalized'].astype(str).str.rstrip('%'), errors='coerce').astype('float32')
+    conn.close()
+    return df
+
+@st.cache_data
 def get_favorite_tactics():
-    """Fetches the user's primary and secondary favorite tactics."""
+    """Fetches the user's primary and secondary favorite tactics. Cleared by
+    set_favorite_tactics()."""
     conn = connect_db()
     cursor = conn.cursor()
     cursor.execute('SELECT value FROM settings WHERE key = "favorite_tactic_1"')
@@ -554,6 +702,7 @@ def set_favorite_tactics(tactic1, tactic2):
         
     conn.commit()
     conn.close()
+    get_favorite_tactics.clear()
 
 def update_player_transfer_status(unique_id, status):
     conn = connect_db()
@@ -844,6 +993,7 @@ def set_national_squad_ids(player_ids):
             data_to_insert = [(pid,) for pid in player_ids]
             cursor.executemany("INSERT INTO national_squad (player_unique_id) VALUES (?)", data_to_insert)
         conn.commit()
+        get_national_squad_players.clear()
     except Exception as e:
         conn.rollback()
         st.error(f"Failed to update national squad: {e}")
@@ -7,7 +7,7 @@ from config_handler import get_age_threshold, get_apt_weight, get_selection_bonu
 from constants import get_position_to_role_mapping, TACTICAL_SLOT_TO_GAME_POSITIONS
 from utils import parse_position_string, format_role_display
 from constants import get_valid_roles, get_tactic_roles
-from sqlite_db import get_all_players, get_latest_dwrs_ratings
+from sqlite_db import get_all_players, get_club_players, get_national_squad_players, get_latest_dwrs_ratings
 from talent_logic import calculate_talent_score, best_dwrs_for_player, talent_age_cap_for_player
 
 def get_last_name(full_name):
@@ -66,12 +66,15 @@ def _apply_footedness_swaps(team, all_players, positions):
 
     return team
 
-@st.cache_data
+@st.cache_resource
 def get_master_role_ratings(user_club=None, second_team_club=None):
     """
     Calculates and caches a master dictionary of NUMERIC DWRS ratings for all players
     in the user's club and second team across all valid roles.
     This new version reads from pre-calculated data instead of recalculating.
+    Held with st.cache_resource: every caller only reads it, and st.cache_data
+    would unpickle a fresh copy of this (roles x players) dict on each call.
+    Cleared by clear_all_caches().
     """
 
     all_ratings_data = get_latest_dwrs_ratings()
@@ -99,16 +102,18 @@ def get_master_role_ratings(user_club=None, second_team_club=None):
     return master_ratings_numeric
 
 @st.cache_data
-def get_cached_squad_analysis(players, tactic, user_club, second_team_club):
+def get_cached_squad_analysis(tactic, user_club, second_team_club):
     """
     A single, cached function to perform all squad calculations.
     Returns a dictionary with all necessary dataframes and lists.
+    The squads are loaded per club inside, so the cache key is just the
+    tactic and club names instead of a deep hash of the whole player list.
     """
-    if not players or not tactic or not user_club:
+    if not tactic or not user_club:
         return {}
 
-    my_club_players = [p for p in players if p.get('Club') == user_club]
-    second_team_players = [p for p in players if p.get('Club') == second_team_club] if second_team_club else []
+    my_club_players = get_club_players(user_club)
+    second_team_players = get_club_players(second_team_club) if second_team_club else []
 
     if not my_club_players:
         return {}
@@ -143,6 +148,21 @@ def get_cached_squad_analysis(players, tactic, user_club, second_team_club):
         "second_team_players": second_team_players
     }
 
+@st.cache_data
+def get_cached_national_squad_analysis(tactic, squad_ids):
+    """
+    Best XI / B-Team / depth for the national squad under one tactic, shared
+    by the National Dashboard and National Best XI. Cached on (tactic, squad
+    IDs), so switching pages or flipping back to a tactic is instant.
+    """
+    positions = get_tactic_roles().get(tactic, {})
+    if not positions:
+        return {}
+    # apply_apt_weight=False: a player's Agreed Playing Time belongs to his
+    # club and must not skew national team selection.
+    return calculate_squad_and_surplus(get_national_squad_players(), positions, get_master_role_ratings(),
+                                       apply_apt_weight=False)
+
 def create_detailed_surplus_df(player_list, master_role_ratings, include_talent=False):
     if not player_list:
         return pd.DataFrame()
@@ -150,7 +170,13 @@ def create_detailed_surplus_df(player_list, master_role_ratings, include_talent=
     outfielder_cap = get_age_threshold('outfielder')
     goalkeeper_cap = get_age_threshold('goalkeeper')
 
-    data = []
+    # Collected column by column so the frame is built from one array per
+    # column (with fixed numeric dtypes) instead of from a list of row dicts.
+    columns = {name: [] for name in ("Name", "Age", "Position", "Best Role", "Best DWRS")}
+    if include_talent:
+        columns["Talent"] = []
+    columns.update({name: [] for name in ("Det", "Wor", "Transfer", "Loan")})
+
     for player in player_list:
         best_dwrs = 0
         best_role_abbr = ''
@@ -163,29 +189,50 @@ def create_detailed_surplus_df(player_list, master_role_ratings, include_talent=
                     best_dwrs = rating
                     best_role_abbr = role
 
-        player_data = {
-            "Name": player['Name'],
-            "Age": player.get('Age', 'N/A'),
-            "Position": player.get('Position', 'N/A'),
-            "Best Role": format_role_display(best_role_abbr) if best_role_abbr else "N/A",
-            "Best DWRS": int(best_dwrs),
-        }
+        columns["Name"].append(player['Name'])
+        columns["Age"].append(player.get('Age', 'N/A'))
+        columns["Position"].append(player.get('Position', 'N/A'))
+        columns["Best Role"].append(format_role_display(best_role_abbr) if best_role_abbr else "N/A")
+        columns["Best DWRS"].append(int(best_dwrs))
         if include_talent:
             age_cap = talent_age_cap_for_player(player, outfielder_cap, goalkeeper_cap)
-            player_data["Talent"] = round(calculate_talent_score(
+            columns["Talent"].append(round(calculate_talent_score(
                 best_dwrs, player.get('Age'),
                 player.get('Determination'), player.get('Work Rate'),
                 player.get('Personality'), age_cap,
-            ))
-        player_data.update({
-            "Det": player.get('Determination', 'N/A'),
-            "Wor": player.get('Work Rate', 'N/A'),
-            "Transfer": "✅" if player.get('transfer_status', 0) else "❌",
-            "Loan": "✅" if player.get('loan_status', 0) else "❌",
-        })
-        data.append(player_data)
-
-    return pd.DataFrame(data)
+            )))
+        columns["Det"].append(player.get('Determination', 'N/A'))
+        columns["Wor"].append(player.get('Work Rate', 'N/A'))
+        columns["Transfer"].append("✅" if player.get('transfer_status', 0) else "❌")
+        columns["Loan"].append("✅" if player.get('loan_status', 0) else "❌")
+
+    df = pd.DataFrame(columns)
+    # Ratings and talent scores are small whole numbers
+    df["Best DWRS"] = df["Best DWRS"].astype('int16')
+    if include_talent:
+        df["Talent"] = df["Talent"].astype('int16')
+    return df
+
+def calculate_positional_strengths(tactic_positions, starting_xi, b_team, best_depth_options):
+    """
+    Average, min and max DWRS per tactic position over the XI player, the
+    B-team player and the role's depth options, for display_strength_grid().
+    All ratings are collected into one frame and reduced with a single
+    groupby; positions without a rated player get zeros.
+    """
+    rows = []
+    for pos_key, role in tactic_positions.items():
+        candidates = [starting_xi.get(pos_key), b_team.get(pos_key)] + list(best_depth_options.get(role, []))
+        rows.extend((pos_key, p.get('name'), p.get('rating')) for p in candidates if p)
+
+    ratings_df = pd.DataFrame(rows, columns=['pos_key', 'name', 'rating'])
+    ratings_df['rating'] = pd.to_numeric(ratings_df['rating'].astype(str).str.rstrip('%'), errors='coerce')
+    ratings_df = ratings_df[(ratings_df['name'] != '-') & ratings_df['rating'].notna()]
+
+    stats = (ratings_df.groupby('pos_key')['rating'].agg(['mean', 'min', 'max'])
+             .rename(columns={'mean': 'avg'})
+             .reindex(list(tactic_positions), fill_value=0))
+    return stats.to_dict('index')
 
 def calculate_squad_and_surplus(my_club_players, positions, master_role_ratings, apply_apt_weight=True):
     """
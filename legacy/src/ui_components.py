@@ -2,12 +2,52 @@
 
 import streamlit as st
 
-from constants import MASTER_POSITION_MAP, APT_ABBREVIATIONS, get_tactic_layouts
+from constants import (MASTER_POSITION_MAP, APT_ABBREVIATIONS, get_tactic_layouts, get_tactic_roles, get_valid_roles,
+                       get_role_specific_weights, get_position_to_role_mapping)
 from sqlite_db import get_club_identity, get_user_club, get_national_team_settings
 from config_handler import get_db_name, get_theme_settings
+from utils import format_role_display, get_role_display_map
 
 def clear_all_caches():
     st.cache_data.clear()
+    st.cache_resource.clear()
+    format_role_display.cache_clear()
+    get_role_display_map.cache_clear()
+    get_role_specific_weights.cache_clear()
+    get_position_to_role_mapping.cache_clear()
+    get_tactic_roles.cache_clear()
+    get_valid_roles.cache_clear()
+
+# Page-level caches built from player rows. Page modules register them with
+# the decorator below, so clearing them never has to import the pages.
+_page_player_data_caches = []
+
+def register_player_data_cache(cached):
+    """Decorator (above @st.cache_data): clear_player_data_caches() also clears
+    this page-level cache."""
+    _page_player_data_caches.append(cached)
+    return cached
+
+def clear_player_data_caches():
+    """
+    Narrower alternative to clear_all_caches() for edits to a player's own
+    fields (club, APT, natural positions, primary role, preferred side).
+    Drops every cache holding player rows or squads built from them, but
+    keeps what those fields cannot change: stored DWRS ratings, definitions,
+    config, weights and rendered assets.
+    """
+    # Imported here: only needed when an edit invalidates player data.
+    from sqlite_db import (get_all_players, get_players_with_role, get_club_players,
+                           get_national_squad_players)
+    from data_parser import (_load_players_df, get_players_by_role, get_player_role_matrix,
+                             get_eligible_national_ids, get_squad_role_best)
+    from squad_logic import get_cached_squad_analysis, get_cached_national_squad_analysis
+
+    for cached in (get_all_players, get_players_with_role, get_club_players, get_national_squad_players,
+                   _load_players_df, get_players_by_role, get_player_role_matrix, get_eligible_national_ids,
+                   get_squad_role_best, get_cached_squad_analysis, get_cached_national_squad_analysis,
+                   *_page_player_data_caches):
+        cached.clear()
 
 def display_tactic_grid(team, title, positions, layout, mode='night'):
     """
@@ -15,6 +55,18 @@ def display_tactic_grid(team, title, positions, layout, mode='night'):
     Now accepts a 'mode' argument to switch between 'day' and 'night' themes.
     """
     st.subheader(title)
+    grid_css, html_out = _render_tactic_grid_html(team, positions, layout, mode)
+    st.markdown(grid_css, unsafe_allow_html=True)
+    st.markdown(html_out, unsafe_allow_html=True)
+
+
+@st.cache_data(ttl=600)
+def _render_tactic_grid_html(team, positions, layout, mode):
+    """
+    Builds the (css, html) strings for display_tactic_grid. Cached on the
+    squad, tactic and theme, so switching tabs or touching unrelated widgets
+    reuses the markup instead of rebuilding every slot.
+    """
     default_player = {"name": "-", "rating": "0%", "apt": ""}
 
     # --- START: THEME-AWARE COLOR DEFINITIONS ---
@@ -112,7 +164,6 @@ def display_tactic_grid(team, title, positions, layout, mode='night'):
         .penalty-arc.bottom {{ bottom: 12.5%; border-radius: 50% 50% 0 0 / 100% 100% 0 0; border-color: {markings_color} transparent transparent transparent; }}
     </style>
     """
-    st.markdown(grid_css, unsafe_allow_html=True)
 
     html_out = '<div class="pitch-grid">'
     # ... (The markings HTML structure remains the same) ...
@@ -126,31 +177,35 @@ def display_tactic_grid(team, title, positions, layout, mode='night'):
     stratum_to_row = {"Strikers": 1, "Attacking Midfield": 2, "Midfield": 3, "Defensive Midfield": 4, "Defense": 5}
     all_player_positions = [pos for stratum in layout.values() for pos in stratum]
 
+    # Grid cell -> position key, resolved once (first position wins a cell)
+    cell_to_pos = {}
+    for pos_key in all_player_positions:
+        stratum, col_index = MASTER_POSITION_MAP.get(pos_key, (None, None))
+        if stratum is None or stratum not in stratum_to_row: continue
+        main_grid_col = col_index + 2 if stratum == "Strikers" else col_index + 1
+        cell_to_pos.setdefault((stratum_to_row[stratum], main_grid_col), pos_key)
+
     for r in range(1, 7):
         if r == 6: continue
         for c in range(1, 6):
             cell_content = ""
             is_placeholder = True
-            for pos_key in all_player_positions:
-                stratum, col_index = MASTER_POSITION_MAP.get(pos_key, (None, None))
-                if stratum is None or stratum_to_row.get(stratum) != r: continue
-                main_grid_col = col_index + 2 if stratum == "Strikers" else col_index + 1
-                if main_grid_col == c:
-                    player_info = team.get(pos_key, default_player)
-                    role = positions.get(pos_key, "")
-                    full_apt = player_info.get('apt', '')
-                    display_apt = APT_ABBREVIATIONS.get(full_apt, full_apt)
-                    apt_html = f"<small style='color: {secondary_text_color};'><i>{display_apt}</i></small>" if display_apt else ""
-                    
-                    # --- UPDATED HTML with dynamic colors ---
-                    cell_content = (f'<div class="player-box">'
-                                    f'<div class="player-name">{player_info["name"]}</div>'
-                                    f'<div class="player-rating"><b>{player_info["rating"]}</b></div>'
-                                    f"<small style='color: {secondary_text_color};'><i>({role})</i></small>"
-                                    f"{apt_html}"
-                                    f'</div>')
-                    is_placeholder = False
-                    break
+            pos_key = cell_to_pos.get((r, c))
+            if pos_key is not None:
+                player_info = team.get(pos_key, default_player)
+                role = positions.get(pos_key, "")
+                full_apt = player_info.get('apt', '')
+                display_apt = APT_ABBREVIATIONS.get(full_apt, full_apt)
+                apt_html = f"<small style='color: {secondary_text_color};'><i>{display_apt}</i></small>" if display_apt else ""
+                
+                # --- UPDATED HTML with dynamic colors ---
+                cell_content = (f'<div class="player-box">'
+                                f'<div class="player-name">{player_info["name"]}</div>'
+                                f'<div class="player-rating"><b>{player_info["rating"]}</b></div>'
+                                f"<small style='color: {secondary_text_color};'><i>({role})</i></small>"
+                                f"{apt_html}"
+                                f'</div>')
+                is_placeholder = False
             if is_placeholder:
                 cell_content = '<div class="placeholder"></div>'
             html_out += cell_content
@@ -171,7 +226,7 @@ def display_tactic_grid(team, title, positions, layout, mode='night'):
     html_out += gk_display
 
     html_out += '</div>'
-    st.markdown(html_out, unsafe_allow_html=True)
+    return grid_css, html_out
 
 
 def display_strength_grid(positional_strengths, tactic, mode='night'):
@@ -5,10 +5,13 @@ import base64
 import streamlit as st
 import re
 from collections import defaultdict
+from functools import lru_cache
 import matplotlib
 import matplotlib.colors as mcolors
+import numpy as np
+import pandas as pd
 
-from constants import get_player_roles, get_valid_roles, get_position_to_role_mapping, MASTER_POSITION_MAP, get_personality_category
+from constants import get_player_roles, get_valid_roles, get_tactic_roles, get_position_to_role_mapping, MASTER_POSITION_MAP, get_personality_category
 from definitions_loader import PROJECT_ROOT
 
 def value_to_float(value_str):
@@ -38,32 +41,73 @@ def value_to_float(value_str):
     except ValueError:
         return 0.0
 
+def transfer_values_to_float(values):
+    """
+    value_to_float for a whole Series as a float array. Many players share a
+    value string, so each distinct one is parsed once and scattered back by
+    factorized codes (missing values give 0.0, as value_to_float does).
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = np.array([value_to_float(v) for v in uniques] + [0.0])
+    return parsed[codes]
+
+@lru_cache(maxsize=8192)
 def get_last_name(full_name):
     """Extracts the last name from a full name string."""
     if isinstance(full_name, str) and full_name:
         return full_name.split(' ')[-1]
     return ""
 
+def get_last_names(names):
+    """get_last_name for a whole Series of names in one vectorized pass."""
+    return names.str.rsplit(' ', n=1).str[-1].fillna('')
+
 def is_national_mode_active():
     """True when the sidebar is switched to National management mode.
     Pages shared between both modes use this to scope their player pool."""
     return st.session_state.get('management_mode') == 'National'
 
+# Shared and must not be mutated; cleared with the definition caches in
+# clear_all_caches().
+@lru_cache(maxsize=1)
 def get_role_display_map():
     player_roles = get_player_roles()
     return {role: name for category in player_roles.values() for role, name in category.items()}
 
+# Called for every role in every sort key, dropdown and table. The role set
+# is small, so results are memoized; clear_all_caches() resets this after
+# definitions change.
+@lru_cache(maxsize=1024)
 def format_role_display(role_abbr):
     return get_role_display_map().get(role_abbr, role_abbr)
 
+@lru_cache(maxsize=8)
+def _favorites_first(fav_tactic1, fav_tactic2, all_tactics):
+    favorites = [t for t in (fav_tactic1, fav_tactic2) if t and t in all_tactics]
+    if len(favorites) == 2 and favorites[0] == favorites[1]:
+        favorites.pop()
+    return tuple(favorites) + tuple(t for t in all_tactics if t not in favorites)
+
+def sort_tactics_favorites_first(fav_tactic1, fav_tactic2, all_tactics):
+    """The tactic picker order: favorite 1, favorite 2, then the rest as given.
+    Memoized on the arguments; returns a fresh list."""
+    return list(_favorites_first(fav_tactic1, fav_tactic2, tuple(all_tactics)))
+
 def format_role_display_with_all(role_abbr):
     return "All Roles" if role_abbr == "All Roles" else get_role_display_map().get(role_abbr, role_abbr)
 
+# Pure and called for the same few theme and palette colors on every rerun
+@lru_cache(maxsize=64)
 def hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
     """Converts a hex color string to an (R, G, B) tuple."""
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
+@lru_cache(maxsize=64)
+def hex_to_rgba_fill(hex_color: str, alpha: float) -> str:
+    """CSS 'rgba(R,G,B, alpha)' string for a hex color, e.g. a chart fill."""
+    return f"rgba({','.join(str(c) for c in hex_to_rgb(hex_color))}, {alpha})"
+
 def get_luminance(rgb: tuple[int, int, int]) -> float:
     """Calculates the relative luminance of an RGB color."""
     vals = []
@@ -102,19 +146,15 @@ def get_available_databases():
     db_files = [f for f in os.listdir(db_folder) if f.endswith('.db') and os.path.isfile(os.path.join(db_folder, f))]
     return sorted([os.path.splitext(f)[0] for f in db_files])
 
-def parse_position_string(pos_str):
-    """
-    Parses a complex position string like 'AM (RL), ST (C)' into a clean set of individual positions.
-    Returns a set to automatically handle duplicates.
-    """
-    if not isinstance(pos_str, str):
-        return set()
-    
+_POSITION_PART_RE = re.compile(r'([A-Z/]+) *(?:\(([RLC]+)\))?$')
+
+@lru_cache(maxsize=4096)
+def _parse_position_string_cached(pos_str):
     final_pos = set()
     # Split by comma for multiple positions like "D (C), DM"
     for part in [p.strip() for p in pos_str.split(',')]:
         # Use regex to find the base position(s) and the sides (R, L, C)
-        match = re.match(r'([A-Z/]+) *(?:\(([RLC]+)\))?$', part.strip())
+        match = _POSITION_PART_RE.match(part.strip())
         if match:
             bases, sides = match.groups()
             # Split bases like "D/WB"
@@ -126,9 +166,22 @@ def parse_position_string(pos_str):
                 else:
                     # For "ST", which implies "ST (C)"
                     final_pos.add(f"{base} (C)" if base == "ST" else base)
-    return final_pos
+    return frozenset(final_pos)
 
-@st.cache_data
+def parse_position_string(pos_str):
+    """
+    Parses a complex position string like 'AM (RL), ST (C)' into a clean set of individual positions.
+    Returns a set to automatically handle duplicates.
+    The same few hundred strings are parsed for every player on every run, so
+    the parse is memoized; each caller gets its own set.
+    """
+    if not isinstance(pos_str, str):
+        return set()
+    return set(_parse_position_string_cached(pos_str))
+
+# Read-only lookup used as a sort key; cache_resource hands back the same dict
+# instead of unpickling a copy on every call. Callers must not mutate it.
+@st.cache_resource
 def get_natural_role_sorter():
     """
     Creates a dictionary mapping each role to a sortable tuple.
@@ -198,6 +251,17 @@ def get_natural_role_sorter():
 
     return role_sorter
 
+@st.cache_data
+def get_natural_sorted_roles(selected_tactic):
+    """
+    The role columns the matrix pages show for a tactic ("All Roles" = every
+    valid role), in natural on-pitch order. Cached per tactic; cleared by
+    clear_all_caches().
+    """
+    role_sorter = get_natural_role_sorter()
+    base_roles = get_valid_roles() if selected_tactic == "All Roles" else set(get_tactic_roles()[selected_tactic].values())
+    return sorted(base_roles, key=lambda r: role_sorter.get(r, (99, 99)))
+
 def _get_smart_style(val, cmap, norm):
     """
     A helper function that calculates background color from a colormap
@@ -235,10 +299,48 @@ except AttributeError:
     _dwrs_cmap = cm.get_cmap('gist_rainbow')
 _dwrs_norm = mcolors.Normalize(vmin=30, vmax=95)
 
+# Ratings are whole percentages, so per-cell callers (Styler.map) hit a
+# small set of values over and over.
+@lru_cache(maxsize=1024)
 def color_dwrs_by_value(val):
     """Applies a smart gist_rainbow gradient to a DWRS value."""
     return _get_smart_style(val, _dwrs_cmap, _dwrs_norm)
 
+# Styles for every whole percentage, so integer rating columns are styled by
+# plain array indexing.
+_DWRS_STYLE_LUT = np.array([color_dwrs_by_value(v) for v in range(101)], dtype=object)
+
+def dwrs_column_styles(column):
+    """
+    color_dwrs_by_value for a whole column (for Styler.apply), leaving empty
+    cells unstyled. Whole-percentage ratings are looked up in _DWRS_STYLE_LUT;
+    anything else (fractions, '85%' strings) styles each distinct value once
+    and scatters the styles back by factorized codes.
+    """
+    valid = column.notna().to_numpy()
+    styles = np.full(len(column), '', dtype=object)
+    if not valid.any():
+        return styles
+    values = column[valid]
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        arr = values.to_numpy(dtype=np.float64)
+        if ((arr >= 0) & (arr <= 100) & (arr == np.floor(arr))).all():
+            styles[valid] = _DWRS_STYLE_LUT[arr.astype(np.intp)]
+            return styles
+    codes, uniques = pd.factorize(values)
+    styles[valid] = np.array([color_dwrs_by_value(v) for v in uniques], dtype=object)[codes]
+    return styles
+
+def top_dwrs_column_styles(column, top_n):
+    """
+    dwrs_column_styles for only the column's top_n ratings (ties keep the
+    earlier rows, as Series.nlargest does); every other cell stays unstyled.
+    """
+    top = column.reset_index(drop=True).nlargest(top_n).index.to_numpy()
+    styles = np.full(len(column), '', dtype=object)
+    styles[top] = dwrs_column_styles(column.iloc[top])
+    return styles
+
 # --- Styler for Attributes (1-20) using CUSTOM if/elif logic ---
 def color_attribute_by_value(val):
     """Applies a custom, high-performance 5-step gradient to an attribute value."""
@@ -271,6 +373,20 @@ def color_attribute_by_value(val):
     except (ValueError, TypeError, AttributeError):
         return ''
 
+# Lower bound of each color_attribute_by_value tier, highest first
+_ATTRIBUTE_TIER_FLOORS = (18, 15, 12, 8)
+
+def attribute_value_styles(values):
+    """
+    color_attribute_by_value for a whole float array at once (for
+    Styler.apply): each value is binned into its tier with np.select and
+    NaN cells are left unstyled.
+    """
+    values = np.asarray(values, dtype=float)
+    conditions = [values >= floor for floor in _ATTRIBUTE_TIER_FLOORS] + [values < _ATTRIBUTE_TIER_FLOORS[-1]]
+    choices = [color_attribute_by_value(floor) for floor in _ATTRIBUTE_TIER_FLOORS] + [color_attribute_by_value(0)]
+    return np.select(conditions, choices, default='').astype(object)
+
 def color_personality(name):
     """Cell/pill style for a personality string, traffic-light by category:
     good = green, neutral = yellow, bad = red. Unknown/empty -> no style."""